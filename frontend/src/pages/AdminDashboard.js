@@ -11,32 +11,41 @@ const AdminDashboard = () => {
   const [profilePic, setProfilePic] = useState(localStorage.getItem("adminAvatar") || "");
   const [error, setError] = useState("");
 
+  const [nextCursor, setNextCursor] = useState(null);
+  const [selected, setSelected] = useState([]);
+
   useEffect(() => {
-    fetchReports();
+    fetchReports("all");
   }, []);
 
-  const fetchReports = async () => {
+  const processReports = (reports) => reports.map(report => ({
+    ...report,
+    category: report.kind === "redflag" ? "Red Flag" : "Intervention",
+    date: report.created_at,
+    userEmail: report.user?.email || "unknown@email.com" // Ensure user email exists
+  }));
+
+  // Filtering and paging happen on the server; "Load more" follows next_cursor
+  const fetchReports = async (type, cursor = null) => {
     try {
       const token = localStorage.getItem("token");
-      const response = await axios.get("https://ireporter-1-50ya.onrender.com/reports", {
+      const endpoint = type === "Red Flag"
+        ? "https://ireporter-1-50ya.onrender.com/redflags"
+        : type === "Intervention"
+          ? "https://ireporter-1-50ya.onrender.com/interventions"
+          : "https://ireporter-1-50ya.onrender.com/reports";
+      const response = await axios.get(endpoint, {
         headers: { Authorization: `Bearer ${token}` },
+        params: cursor ? { cursor } : {},
       });
 
       if (response.data) {
-        const processReports = (reports, category) => reports.map(report => ({
-          ...report,
-          category,
-          date: report.created_at,
-          userEmail: report.user?.email || "unknown@email.com" // Ensure user email exists
-        }));
-
-        const combinedReports = [
-          ...processReports(response.data.redflags, "Red Flag"),
-          ...processReports(response.data.interventions, "Intervention")
-        ];
+        const page = processReports(response.data.items);
 
+        const combinedReports = cursor ? [...reports, ...page] : page;
         setReports(combinedReports);
         setFilteredReports(combinedReports);
+        setNextCursor(response.data.next_cursor);
       }
     } catch (error) {
       setError("Error fetching reports");
@@ -46,7 +55,7 @@ const AdminDashboard = () => {
 
   const filterReports = (type) => {
     setFilterType(type);
-    setFilteredReports(type === "all" ? reports : reports.filter(report => report.category === type));
+    fetchReports(type);
   };
 
   const updateStatus = async (reportId, status, category) => {
@@ -63,26 +72,12 @@ const AdminDashboard = () => {
         { headers: { Authorization: `Bearer ${token}` } }
       );
 
-      // Find report for email and update local state
-      const updatedReports = reports.map(report => {
-        if (report.id === reportId) {
-          const updated = { ...report, status: status.toLowerCase() };
-          
-          // Send email notification
-          axios.post(
-            "https://ireporter-1-50ya.onrender.com/send-mail",
-            {
-              email: updated.userEmail,
-              status: status.toLowerCase(),
-              report_id: reportId
-            },
-            { headers: { Authorization: `Bearer ${token}` } }
-          );
-
-          return updated;
-        }
-        return report;
-      });
+      // The server emails the reporter once the status change is committed
+      const updatedReports = reports.map(report =>
+        report.id === reportId && report.category === category
+          ? { ...report, status: status.toLowerCase() }
+          : report
+      );
 
       setReports(updatedReports);
       setFilteredReports(updatedReports);
@@ -93,6 +88,53 @@ const AdminDashboard = () => {
     }
   };
 
+  const reportKey = (report) => `${report.category}:${report.id}`;
+
+  const toggleSelected = (report) => {
+    const key = reportKey(report);
+    setSelected(prev => prev.includes(key) ? prev.filter(k => k !== key) : [...prev, key]);
+  };
+
+  // One request for the whole selection instead of a PATCH per report
+  const bulkUpdateStatus = async (status) => {
+    const targets = reports.filter(report => selected.includes(reportKey(report)));
+    if (targets.length === 0) return;
+
+    try {
+      const token = localStorage.getItem("token");
+      const response = await axios.post(
+        "https://ireporter-1-50ya.onrender.com/reports/bulk",
+        {
+          operations: targets.map(report => ({
+            type: report.category === "Red Flag" ? "redflag" : "intervention",
+            id: report.id,
+            status,
+          })),
+        },
+        { headers: { Authorization: `Bearer ${token}` } }
+      );
+
+      const updated = new Set();
+      response.data.results.forEach((result, i) => {
+        if (result.ok) updated.add(reportKey(targets[i]));
+      });
+      const updatedReports = reports.map(report =>
+        updated.has(reportKey(report)) ? { ...report, status } : report
+      );
+      setReports(updatedReports);
+      setFilteredReports(updatedReports);
+      setSelected([]);
+
+      if (response.data.failed > 0) {
+        setError(`${response.data.failed} report(s) could not be updated`);
+        setTimeout(() => setError(""), 5000);
+      }
+    } catch (error) {
+      setError(`Update failed: ${error.response?.data?.error || error.message}`);
+      setTimeout(() => setError(""), 5000);
+    }
+  };
+
   const handleProfilePicChange = (event) => {
     const file = event.target.files[0];
     if (file) {
@@ -141,9 +183,21 @@ const AdminDashboard = () => {
       <div className="reports-table">
         <h2>Latest Reports</h2>
         {error && <p className="error-message">{error}</p>}
+        {selected.length > 0 && (
+          <div className="bulk-actions">
+            <span>{selected.length} selected</span>
+            <button onClick={() => bulkUpdateStatus("resolved")} className="status-btn resolved">
+              Resolve selected
+            </button>
+            <button onClick={() => bulkUpdateStatus("rejected")} className="status-btn rejected">
+              Reject selected
+            </button>
+          </div>
+        )}
         <table>
           <thead>
             <tr>
+              <th></th>
               <th>#</th>
               <th>Report</th>
               <th>Date</th>
@@ -153,7 +207,14 @@ const AdminDashboard = () => {
           </thead>
           <tbody>
             {filteredReports.map((report, index) => (
-              <tr key={report.id}>
+              <tr key={reportKey(report)}>
+                <td>
+                  <input
+                    type="checkbox"
+                    checked={selected.includes(reportKey(report))}
+                    onChange={() => toggleSelected(report)}
+                  />
+                </td>
                 <td>{index + 1}</td>
                 <td>{report.title}</td>
                 <td>{new Date(report.date).toLocaleDateString()}</td>
@@ -184,9 +245,14 @@ const AdminDashboard = () => {
             ))}
           </tbody>
         </table>
+        {nextCursor && (
+          <button onClick={() => fetchReports(filterType, nextCursor)} className="load-more-btn">
+            Load more
+          </button>
+        )}
         {filteredReports.length === 0 && (
           <tr>
-            <td colSpan="5" className="no-reports">
+            <td colSpan="6" className="no-reports">
               No reports available
             </td>
           </tr>
@@ -8,6 +8,7 @@ const AllReports = () => {
   const [reports, setReports] = useState([]);
   const [loading, setLoading] = useState(true);
   const [error, setError] = useState(null);
+  const [nextCursor, setNextCursor] = useState(null);
 
   const getStoredUser = useCallback(() => {
     try {
@@ -17,13 +18,15 @@ const AllReports = () => {
     }
   }, []);
 
-  const fetchUserReports = useCallback(async (token) => {
+  const fetchUserReports = useCallback(async (token, cursor = null) => {
     const controller = new AbortController();
     try {
       setLoading(true);
       setError(null);
 
-      const response = await fetch("https://ireporter-1-50ya.onrender.com/reports", {
+      const url = "https://ireporter-1-50ya.onrender.com/reports" +
+        (cursor ? `?cursor=${encodeURIComponent(cursor)}` : "");
+      const response = await fetch(url, {
         method: "GET",
         headers: { Authorization: `Bearer ${token}` },
         signal: controller.signal,
@@ -35,17 +38,15 @@ const AllReports = () => {
       }
 
       const data = await response.json();
-      const processReports = (arr, type) => arr.map(item => ({
+      // The server returns red flags and interventions as one sorted feed
+      const page = data.items.map(item => ({
         ...item,
-        type,
+        type: item.kind,
         created_at: new Date(item.created_at).toLocaleString(),
         updated_at: new Date(item.updated_at).toLocaleString()
       }));
-
-      setReports([
-        ...processReports(data.redflags, "redflag"),
-        ...processReports(data.interventions, "intervention")
-      ]);
+      setReports(prev => (cursor ? [...prev, ...page] : page));
+      setNextCursor(data.next_cursor);
     } catch (error) {
       if (error.name !== "AbortError") {
         setError(error.message);
@@ -195,6 +196,15 @@ const AllReports = () => {
             ))}
           </div>
         )}
+
+        {nextCursor && !loading && (
+          <button
+            className="load-more"
+            onClick={() => fetchUserReports(localStorage.getItem("token"), nextCursor)}
+          >
+            Load more
+          </button>
+        )}
       </main>
     </div>
   );
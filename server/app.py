@@ -1,118 +1,182 @@
-from functools import wraps
-import os
-from flask import Flask, jsonify, request, send_from_directory, Blueprint
-from werkzeug.utils import secure_filename
+import secrets
+import time
+from flask import Flask, Response, current_app, jsonify, request, stream_with_context, url_for, Blueprint
 from flask_cors import CORS, cross_origin
-from flask_migrate import Migrate
-from flask_sqlalchemy import SQLAlchemy
-from flask_mail import Mail, Message
-from auth import auth_bp, blacklist
-from flask_jwt_extended import JWTManager, get_jwt_identity, jwt_required
-from models import db, Intervention, RedFlag, Status, User
-
-# Initialize Flask app
-app = Flask(__name__)
-
-# CORS configuration
-CORS(app)
-
-# JWT Manager initialization
-jwt = JWTManager(app)
-
-# App configuration
-app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///reports.db'
-app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
-app.config['UPLOAD_FOLDER'] = 'uploads'
-app.config['ALLOWED_EXTENSIONS'] = {'png', 'jpg', 'jpeg', 'gif', 'mp4', 'mov', 'avi'}
-app.config['SECRET_KEY'] = 'supersecretkey'
-app.config['JWT_ACCESS_TOKEN_EXPIRES'] = False  
-
-# Initialize extensions
-db.init_app(app)
-migrate = Migrate(app, db)
-
-# Register blueprints
-app.register_blueprint(auth_bp, url_prefix='/auth')
-
-# Flask-Mail configuration
-def setup_mail(app):
-    app.config["MAIL_SERVER"] = "smtp.gmail.com"
-    app.config["MAIL_PORT"] = 587
-    app.config["MAIL_USE_TLS"] = True
-    app.config["MAIL_USERNAME"] = "kamalabdi042@gmail.com"
-    app.config["MAIL_PASSWORD"] = "vdwa vejv ylts bxbb"
-    app.config["MAIL_DEFAULT_SENDER"] = "kamalabdi042@gmail.com"
-    mail = Mail(app)
-    return mail
-
-mail = setup_mail(app)
+from werkzeug.middleware.proxy_fix import ProxyFix
+from auth import auth_bp
+from config import Config
+import database
+from flask_jwt_extended import current_user, get_jwt, jwt_required
+from models import db, Intervention, RedFlag, Report, Status
+from bulk import BulkError, apply_operations
+from compression import compressor
+from conditional import conditional, listing_etag, report_etag
+from events import BUSY_RETRY_MS, change_feed, register_change_feed
+from exports import EXPORT_FORMATS, stream_export
+from extensions import jwt, mail, migrate
+from geo import (MAX_MARKERS, GeoError, clusters, nearest, parse_box, parse_near_limit, parse_point,
+                 parse_zoom, should_cluster, within_box)
+from idempotency import idempotency_store
+from identity import identity_cache
+from ingest import IngestError, ingest, json_records, ndjson_records, parse_coordinate, validate_report
+from media import THUMBNAIL_EXTENSIONS, UploadError, receive_upload, send_media, thumbnail_name, thumbnail_worker
+from notifications import register_listeners
+from outbox import outbox_worker
+from pagination import PAGE_KEYS, PaginationError, apply_filters, paginate
+from passwords import password_hasher
+from ratelimit import rate_limiter
+from revocation import revocation_store
+from search import search
+from serializers import COLUMNS_MIMETYPE, FieldsError, intervention_serializer, redflag_serializer, report_serializer
+from stats import read_stats, rebuild_counters, register_counters
+
+api_bp = Blueprint('api', __name__, cli_group=None)
+
+
+def create_app(config=Config):
+    """Build a configured application; extensions are bound here, not at import."""
+    app = Flask(__name__)
+    app.config.from_object(config)
+    if not app.config.get('SECRET_KEY'):
+        if not (app.debug or app.testing):
+            raise RuntimeError('SECRET_KEY must be set; it signs every access token.')
+        app.config['SECRET_KEY'] = secrets.token_hex(32)
+    hops = app.config.get('PROXY_FIX_X_FOR', 0)
+    if hops:
+        app.wsgi_app = ProxyFix(app.wsgi_app, x_for=hops, x_proto=hops)
+
+    CORS(app)
+    jwt.init_app(app)
+    db.init_app(app)
+    database.init_app(app, db)
+    migrate.init_app(app, db)
+    mail.init_app(app)
+
+    app.register_blueprint(auth_bp, url_prefix='/auth')
+    app.register_blueprint(api_bp)
+
+    # Background threads start on the first request, so with gunicorn
+    # --preload they run in each worker rather than in the parent.
+    outbox_worker.init_app(app, mail)
+    revocation_store.init_app(app, jwt)
+    password_hasher.init_app(app)
+    rate_limiter.init_app(app)
+    identity_cache.init_app(app, jwt)
+    idempotency_store.init_app(app)
+    thumbnail_worker.init_app(app)
+    compressor.init_app(app)
+    change_feed.init_app(app)
+    register_listeners()
+    register_counters()
+    register_change_feed()
+    return app
 
 def allowed_file(filename):
-    return '.' in filename and filename.rsplit('.', 1)[1].lower() in app.config['ALLOWED_EXTENSIONS']
+    return '.' in filename and filename.rsplit('.', 1)[1].lower() in current_app.config['ALLOWED_EXTENSIONS']
 
-@app.route('/uploads/<filename>')
+@api_bp.route('/uploads/<filename>')
 def uploaded_file(filename):
-    return send_from_directory(app.config['UPLOAD_FOLDER'], filename)
+    return send_media(current_app.config['UPLOAD_FOLDER'], filename, current_app.config['MEDIA_ACCEL_REDIRECT_PREFIX'])
+
+# Store a file under its SHA-256 and return the short URL to put in image_url
+@api_bp.route('/uploads', methods=['POST'])
+@cross_origin(origin="*", supports_credentials=True)
+@jwt_required()
+def upload_media():
+    try:
+        filename, digest, size, created = receive_upload(
+            request.environ, current_app.config['UPLOAD_FOLDER'], allowed_file)
+    except UploadError as e:
+        return jsonify({'error': str(e)}), 400
+
+    thumbnail_url = None
+    if filename.rsplit('.', 1)[1] in THUMBNAIL_EXTENSIONS:
+        thumbnail_worker.submit(filename)
+        thumbnail_url = url_for('.uploaded_file', filename=thumbnail_name(digest))
+
+    return jsonify({
+        'url': url_for('.uploaded_file', filename=filename),
+        'thumbnail_url': thumbnail_url,
+        'sha256': digest,
+        'size': size
+    }), 201 if created else 200
+
+# Listings answer in plain JSON unless the client asks for the columnar form.
+LISTING_MIMETYPES = ['application/json', COLUMNS_MIMETYPE]
+
+def report_listing(query, model, serializer, scope):
+    """One keyset page of ``query`` as {items, next_cursor}, or a 304 if it has not changed.
+
+    ``?fields=id,title,...`` narrows both the SELECT and the items; the
+    cursor's (created_at, id) are always read. ``Accept:`` COLUMNS_MIMETYPE
+    returns {fields, rows, next_cursor} instead. ``scope`` names the
+    change marker covering every row ``query`` can return.
+    """
+    serializer = serializer.project(request.args.get('fields'), keys=PAGE_KEYS)
+    mimetype = request.accept_mimetypes.best_match(LISTING_MIMETYPES, 'application/json')
+
+    def render():
+        rows, next_cursor = paginate(query.with_entities(*serializer.columns), model, request.args)
+        if mimetype == COLUMNS_MIMETYPE:
+            response = jsonify(dict(serializer.dump_columns(rows), next_cursor=next_cursor))
+            response.mimetype = COLUMNS_MIMETYPE
+            return response
+        return jsonify({'items': serializer.dump_rows(rows), 'next_cursor': next_cursor})
+
+    etag = listing_etag(request.args, scope)
+    response = conditional(etag if mimetype == 'application/json' else f'{etag}-columns', render)
+    response.vary.add('Accept')
+    return response
 
 # -------------------------
 # RedFlag Routes
 # -------------------------
 
-@app.route('/redflags', methods=['GET', 'POST'])
+@api_bp.route('/redflags', methods=['GET', 'POST'])
 @cross_origin(origin="*", supports_credentials=True)
 @jwt_required()
+@idempotency_store.idempotent
 def handle_redflags():
     if request.method == 'GET':
-        redflags = RedFlag.query.all()
-        return jsonify([r.to_dict() for r in redflags]), 200
+        try:
+            return report_listing(RedFlag.query, RedFlag, redflag_serializer, 'kind:redflag')
+        except (FieldsError, PaginationError) as e:
+            return jsonify({'error': str(e)}), 400
     elif request.method == 'POST':
-        current_user_id = get_jwt_identity()
         data = request.get_json()
         
         if not data:
             return jsonify({'error': 'Missing JSON data'}), 400
 
-        required_fields = ['title', 'description', 'location']
-        for field in required_fields:
-            if field not in data or not data[field]:
-                return jsonify({'error': f'Missing required field: {field}'}), 400
+        fields = validate_report(data)
+        if isinstance(fields, str):
+            return jsonify({'error': fields}), 400
 
-        try:
-            latitude = float(data.get('latitude')) if data.get('latitude') else None
-            longitude = float(data.get('longitude')) if data.get('longitude') else None
-        except ValueError:
-            return jsonify({'error': 'Latitude and longitude must be numbers'}), 400
-
-        redflag = RedFlag(
-            title=data['title'],
-            description=data['description'],
-            location=data['location'],
-            latitude=latitude,
-            longitude=longitude,
-            image_url=data.get('image_url'),
-            user_id=current_user_id
-        )
+        redflag = RedFlag(user_id=current_user.id, **fields)
         db.session.add(redflag)
-        db.session.commit()
+        # Flushed, not committed: idempotent commits it together with the key.
+        db.session.flush()
         return jsonify(redflag.to_dict()), 201
 
-@app.route('/redflags/<int:id>', methods=['GET', 'PATCH', 'DELETE'])
+@api_bp.route('/redflags/<int:id>', methods=['GET', 'PATCH', 'DELETE'])
 @jwt_required()
 @cross_origin(origin="*", supports_credentials=True)
 def manage_redflag(id):
     redflag = RedFlag.query.get_or_404(id)
-    current_user_id = get_jwt_identity()
 
     if request.method == 'GET':
-        return jsonify(redflag.to_dict()), 200
+        return conditional(report_etag(redflag), lambda: jsonify(redflag.to_dict()), redflag.updated_at)
     
     elif request.method == 'PATCH':
-        if redflag.user_id != current_user_id:
+        # Owners edit their reports; admins may only change the status of others' during triage
+        if redflag.user_id != current_user.id and not current_user.is_admin:
             return jsonify({'error': 'Unauthorized access.'}), 403
 
         data = request.get_json()
         if not data:
             return jsonify({'error': 'Missing JSON data.'}), 400
+        if redflag.user_id != current_user.id and set(data) - {'status'}:
+            return jsonify({'error': 'Admins may only change the status of reports they do not own.'}), 403
 
         # Update fields
         fields = ['title', 'description', 'location', 'image_url']
@@ -122,17 +186,16 @@ def manage_redflag(id):
 
         # Handle coordinates
         try:
-            if 'latitude' in data:
-                redflag.latitude = float(data['latitude'])
-            if 'longitude' in data:
-                redflag.longitude = float(data['longitude'])
-        except ValueError:
-            return jsonify({'error': 'Coordinates must be numbers.'}), 400
+            for field in ('latitude', 'longitude'):
+                if field in data:
+                    setattr(redflag, field, parse_coordinate(data, field))
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
 
         # Handle status
         if 'status' in data:
             try:
-                redflag.status = Status(data['status'].lower()) 
+                redflag.status = Status(data['status'].lower()).value
             except ValueError:
                 return jsonify({'error': 'Invalid status value.'}), 400
 
@@ -140,9 +203,9 @@ def manage_redflag(id):
         return jsonify(redflag.to_dict()), 200
     
     elif request.method == 'DELETE':
-        if redflag.user_id != current_user_id:
+        if redflag.user_id != current_user.id:
             return jsonify({'error': 'Unauthorized access.'}), 403
-        if redflag.status not in [Status.DRAFT, Status.RESOLVED]:
+        if redflag.status not in [Status.DRAFT.value, Status.RESOLVED.value]:
             return jsonify({'error': 'Cannot delete report in current status'}), 400
         
         db.session.delete(redflag)
@@ -153,61 +216,52 @@ def manage_redflag(id):
 # Intervention Routes
 # -------------------------
 
-@app.route('/interventions', methods=['GET', 'POST'])
+@api_bp.route('/interventions', methods=['GET', 'POST'])
 @cross_origin(origin="*", supports_credentials=True)
 @jwt_required()
+@idempotency_store.idempotent
 def handle_interventions():
     if request.method == 'GET':
-        interventions = Intervention.query.all()
-        return jsonify([i.to_dict() for i in interventions]), 200
+        try:
+            return report_listing(Intervention.query, Intervention, intervention_serializer,
+                                  'kind:intervention')
+        except (FieldsError, PaginationError) as e:
+            return jsonify({'error': str(e)}), 400
     elif request.method == 'POST':
-        current_user_id = get_jwt_identity()
         data = request.get_json()
         
         if not data:
             return jsonify({'error': 'Missing JSON data'}), 400
 
-        required_fields = ['title', 'description', 'location']
-        for field in required_fields:
-            if field not in data or not data[field]:
-                return jsonify({'error': f'Missing required field: {field}'}), 400
+        fields = validate_report(data)
+        if isinstance(fields, str):
+            return jsonify({'error': fields}), 400
 
-        try:
-            latitude = float(data.get('latitude')) if data.get('latitude') else None
-            longitude = float(data.get('longitude')) if data.get('longitude') else None
-        except ValueError:
-            return jsonify({'error': 'Latitude and longitude must be numbers'}), 400
-
-        intervention = Intervention(
-            title=data['title'],
-            description=data['description'],
-            location=data['location'],
-            latitude=latitude,
-            longitude=longitude,
-            image_url=data.get('image_url'),
-            user_id=current_user_id
-        )
+        intervention = Intervention(user_id=current_user.id, **fields)
         db.session.add(intervention)
-        db.session.commit()
+        # Flushed, not committed: idempotent commits it together with the key.
+        db.session.flush()
         return jsonify(intervention.to_dict()), 201
 
-@app.route('/interventions/<int:id>', methods=['GET', 'PATCH', 'DELETE'])
+@api_bp.route('/interventions/<int:id>', methods=['GET', 'PATCH', 'DELETE'])
 @jwt_required()
 @cross_origin(origin="*", supports_credentials=True)
 def manage_intervention(id):
     intervention = Intervention.query.get_or_404(id)
-    current_user_id = get_jwt_identity()
 
     if request.method == 'GET':
-        return jsonify(intervention.to_dict()), 200
+        return conditional(report_etag(intervention), lambda: jsonify(intervention.to_dict()), intervention.updated_at)
     
     elif request.method == 'PATCH':
-        if intervention.user_id != current_user_id:
+        # Owners edit their reports; admins may only change the status of others' during triage
+        if intervention.user_id != current_user.id and not current_user.is_admin:
             return jsonify({'error': 'Unauthorized access.'}), 403
 
         data = request.get_json()
         if not data:
             return jsonify({'error': 'Missing JSON data.'}), 400
+        if intervention.user_id != current_user.id and set(data) - {'status'}:
+            return jsonify({'error': 'Admins may only change the status of reports they do not own.'}), 403
 
         # Update fields
         fields = ['title', 'description', 'location', 'image_url']
@@ -217,87 +271,249 @@ def manage_intervention(id):
 
         # Handle coordinates
         try:
-            if 'latitude' in data:
-                intervention.latitude = float(data['latitude'])
-            if 'longitude' in data:
-                intervention.longitude = float(data['longitude'])
-        except ValueError:
-            return jsonify({'error': 'Coordinates must be numbers.'}), 400
+            for field in ('latitude', 'longitude'):
+                if field in data:
+                    setattr(intervention, field, parse_coordinate(data, field))
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
 
         # Handle status
         if 'status' in data:
             try:
-                intervention.status = Status(data['status'].lower()) 
+                intervention.status = Status(data['status'].lower()).value
             except ValueError:
                 return jsonify({'error': 'Invalid status value.'}), 400
         db.session.commit()
         return jsonify(intervention.to_dict()), 200
     
     elif request.method == 'DELETE':
-        if intervention.user_id != current_user_id:
+        if intervention.user_id != current_user.id:
             return jsonify({'error': 'Unauthorized access.'}), 403
-        if intervention.status not in [Status.DRAFT, Status.RESOLVED]:
+        if intervention.status not in [Status.DRAFT.value, Status.RESOLVED.value]:
             return jsonify({'error': 'Cannot delete report in current status'}), 400
 
         db.session.delete(intervention)
         db.session.commit()
         return jsonify({'message': 'Intervention deleted successfully.'}), 200
     
-# Getting all reports
-@app.route('/reports', methods=['GET'])
+def scoped_report_query():
+    """Reports visible to the caller: every row for admins, otherwise their own."""
+    reports = Report.query.with_entities(*report_serializer.columns)
+    if not current_user.is_admin:
+        reports = reports.filter(Report.user_id == current_user.id)
+    return reports
+
+# Getting all reports: one newest-first feed of red flags and interventions
+@api_bp.route('/reports', methods=['GET'])
 @cross_origin(origin="*", supports_credentials=True)
 @jwt_required()
 def get_all_reports():
-    current_user_id = get_jwt_identity()
-    current_user = User.query.get(current_user_id)
-    
-    if current_user.role == 'admin':
-         redflags = RedFlag.query.all()
-         interventions = Intervention.query.all()
-    else:
-        redflags = RedFlag.query.filter_by(user_id=current_user_id).all()
-        interventions = Intervention.query.filter_by(user_id=current_user_id).all()
-    
+    scope = 'all' if current_user.is_admin else f'user:{current_user.id}'
+    try:
+        return report_listing(scoped_report_query(), Report, report_serializer, scope)
+    except (FieldsError, PaginationError) as e:
+        return jsonify({'error': str(e)}), 400
+
+# Ranked keyword search over titles, descriptions and locations
+@api_bp.route('/reports/search', methods=['GET'])
+@cross_origin(origin="*", supports_credentials=True)
+@jwt_required()
+def search_reports():
+    # ?q= is the search itself here, not the substring filter of the listings.
+    filters = {key: value for key, value in request.args.items() if key != 'q'}
+    try:
+        reports = apply_filters(scoped_report_query(), Report, filters)
+        reports, next_cursor = search(reports, Report, request.args, db.engine.dialect.name)
+    except PaginationError as e:
+        return jsonify({'error': str(e)}), 400
+
     return jsonify({
-        "redflags": [r.to_dict() for r in redflags],
-        "interventions": [i.to_dict() for i in interventions]
+        "items": report_serializer.dump_rows(reports),
+        "next_cursor": next_cursor
     }), 200
 
+# Bulk status update / delete for admin triage
+@api_bp.route('/reports/bulk', methods=['POST'])
+@cross_origin(origin="*", supports_credentials=True)
+@jwt_required()
+def bulk_update_reports():
+    if not current_user.is_admin:
+        return jsonify({'error': 'Unauthorized access.'}), 403
+
+    data = request.get_json(silent=True)
+    if not data:
+        return jsonify({'error': 'Missing JSON data.'}), 400
 
-# -------------------------
-# Other Routes
-# -------------------------
+    try:
+        results = apply_operations(data.get('operations') if isinstance(data, dict) else data)
+    except BulkError as e:
+        return jsonify({'error': str(e)}), 400
+    db.session.commit()
+
+    return jsonify({
+        'results': results,
+        'succeeded': sum(1 for r in results if r['ok']),
+        'failed': sum(1 for r in results if not r['ok'])
+    }), 200
+
+# Many red flags and interventions at once, for offline clients and partner imports
+@api_bp.route('/reports/batch', methods=['POST'])
+@cross_origin(origin="*", supports_credentials=True)
+@jwt_required()
+def batch_create_reports():
+    try:
+        if request.mimetype == 'application/x-ndjson':
+            records = ndjson_records(request.stream)
+        else:
+            data = request.get_json(silent=True)
+            if data is None:
+                return jsonify({'error': 'Missing JSON data.'}), 400
+            records = json_records(data)
+        results = ingest(records, current_user.id)
+    except IngestError as e:
+        return jsonify({'error': str(e)}), 400
+
+    return jsonify({
+        'results': results,
+        'succeeded': sum(1 for r in results if r['ok']),
+        'failed': sum(1 for r in results if not r['ok'])
+    }), 200
+
+# Dashboard counts per status, kind, user and day
+@api_bp.route('/reports/stats', methods=['GET'])
+@cross_origin(origin="*", supports_credentials=True)
+@jwt_required()
+def report_stats():
+    if not current_user.is_admin:
+        return jsonify({'error': 'Unauthorized access.'}), 403
+    return jsonify(read_stats()), 200
+
+# Reports closest to a point, nearest first
+@api_bp.route('/reports/near', methods=['GET'])
+@cross_origin(origin="*", supports_credentials=True)
+@jwt_required()
+def reports_near():
+    try:
+        point = parse_point(request.args)
+        limit = parse_near_limit(request.args)
+        reports = apply_filters(scoped_report_query(), Report, request.args)
+    except (GeoError, PaginationError) as e:
+        return jsonify({'error': str(e)}), 400
+
+    found = nearest(reports, Report, point, limit)
+    items = report_serializer.dump_rows(row for _, row in found)
+    for item, (distance, _) in zip(items, found):
+        item['distance'] = round(distance, 1)
+    return jsonify({'items': items}), 200
+
+# Reports in a map viewport: individual markers, or clusters when zoomed out or crowded
+@api_bp.route('/reports/map', methods=['GET'])
+@cross_origin(origin="*", supports_credentials=True)
+@jwt_required()
+def reports_map():
+    try:
+        box = parse_box(request.args)
+        zoom = parse_zoom(request.args)
+        reports = apply_filters(scoped_report_query(), Report, request.args)
+    except (GeoError, PaginationError) as e:
+        return jsonify({'error': str(e)}), 400
+
+    if not should_cluster(zoom):
+        rows = (reports.filter(within_box(Report, box))
+                .order_by(Report.created_at.desc(), Report.id.desc())
+                .limit(MAX_MARKERS + 1).all())
+        if len(rows) <= MAX_MARKERS:
+            return jsonify({'items': report_serializer.dump_rows(rows), 'clusters': []}), 200
+    return jsonify({'items': [], 'clusters': clusters(reports, Report, box)}), 200
+
+# A token for opening /reports/events, which EventSource cannot send headers to.
+# It is valid until the access token it was minted with expires or is revoked.
+@api_bp.route('/reports/events/token', methods=['POST'])
+@cross_origin(origin="*", supports_credentials=True)
+@jwt_required()
+def report_events_token():
+    payload = get_jwt()
+    return jsonify({
+        'token': change_feed.issue_token(current_user.id, payload),
+        'expires_in': max(0, int(payload['exp'] - time.time()))
+    }), 201
+
+# Live report changes as Server-Sent Events, instead of re-polling /reports.
+# Open with ?token= from POST /reports/events/token. EventSource reconnects by
+# itself when a stream ends; on a reauth event, or an error, mint a new token
+# and reopen with ?last_event_id= set to the last event's id.
+@api_bp.route('/reports/events', methods=['GET'])
+@cross_origin(origin="*", supports_credentials=True)
+def report_events():
+    claims = change_feed.token_claims(request.args.get('token', ''))
+    user = None
+    if claims is not None and not revocation_store.is_revoked(claims):
+        user = identity_cache.get(claims['user_id'])
+    if user is None:
+        return jsonify({'error': 'A valid stream token is required.'}), 401
+    headers = {'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    if not change_feed.acquire():
+        # A 200 whose stream ends at once, since EventSource gives up on a 503.
+        return Response(change_feed.busy(), mimetype='text/event-stream',
+                        headers={**headers, 'Retry-After': str(BUSY_RETRY_MS // 1000)})
+
+    try:
+        last_event_id = request.headers.get('Last-Event-ID') or request.args.get('last_event_id')
+        after, gaps, in_log = change_feed.position(last_event_id)
+        stream = change_feed.stream(after, gaps, in_log, None if user.is_admin else user.id, claims['exp'])
+        response = Response(stream_with_context(stream), mimetype='text/event-stream', headers=headers)
+    except BaseException:
+        change_feed.release()
+        raise
+    # The slot is held until the server closes the response, however the stream ends.
+    response.call_on_close(change_feed.release)
+    return response
+
+# Streaming bulk export
+@api_bp.route('/reports/export', methods=['GET'])
+@cross_origin(origin="*", supports_credentials=True)
+@jwt_required()
+def export_reports():
+    export_format = request.args.get('format', 'ndjson').lower()
+    if export_format not in EXPORT_FORMATS:
+        return jsonify({'error': 'format must be one of: ndjson, json, csv'}), 400
 
-@app.route("/send-mail", methods=["POST"])
-@cross_origin()
-def send_mail():
     try:
-        data = request.json
-        email = data.get("email")
-        status = data.get("status")
-        report_id = data.get("report_id")
+        reports = apply_filters(scoped_report_query(), Report, request.args)
+    except PaginationError as e:
+        return jsonify({'error': str(e)}), 400
+
+    filename = f"{request.args.get('kind', 'all')}-reports.{export_format}"
+    return Response(
+        stream_with_context(stream_export(export_format, report_serializer, reports.order_by(Report.id))),
+        mimetype=EXPORT_FORMATS[export_format],
+        headers={'Content-Disposition': f'attachment; filename="{filename}"'}
+    )
+
 
-        if not email or not status or not report_id:
-            return jsonify({"error": "Missing required fields"}), 400
+@api_bp.cli.command('rebuild-stats')
+def rebuild_stats_command():
+    """Recount report_counters from the reports table."""
+    written = rebuild_counters()
+    db.session.commit()
+    print(f'Rebuilt {written} report counters.')
 
-        subject = f"Report Status Update - Report #{report_id}"
-        body = f"Hello,\n\nYour report (ID: {report_id}) has been updated to: {status.upper()}.\n\nThank you."
 
-        msg = Message(subject, recipients=[email], body=body)
-        mail.send(msg)
+@api_bp.cli.command('prune-events')
+def prune_events_command():
+    """Delete report changes older than EVENT_LOG_HOURS; schedule it, e.g. hourly."""
+    print(f'Pruned {change_feed.prune()} report changes.')
 
-        return jsonify({"message": f"Email sent to {email}"}), 200
-    except Exception as e:
-        return jsonify({"error": str(e)}), 500
 
-@app.route('/auth/email', methods=['GET'])
+# -------------------------
+# Other Routes
+# -------------------------
+
+@api_bp.route('/auth/email', methods=['GET'])
 @jwt_required()
 def get_mail():
-    current_user = get_jwt_identity()
-    user = User.query.filter_by(id=current_user).first()
-    return jsonify({'message': 'success', 'email': user.email}), 200
+    return jsonify({'message': 'success', 'email': current_user.email}), 200
 
 
 if __name__ == '__main__':
-    with app.app_context():
-        app.run(debug=True)
+    create_app().run(debug=True)
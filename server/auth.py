@@ -3,18 +3,32 @@ from flask_cors import CORS, cross_origin
 from flask_jwt_extended import (
     create_access_token, jwt_required, get_jwt
 )
+from identity import identity_cache, user_claims
 from models import db, User
+from passwords import HasherBusy
+from ratelimit import rate_limiter
+from revocation import revocation_store
+from serializers import user_serializer
 from flask_cors import CORS
 from flask_cors import CORS, cross_origin
 
 
 
+# (attempts, seconds) per client IP and per email address. The IP limits
+# leave room for many agents signing in from one office address.
+LOGIN_LIMITS = {'per_ip': (60, 60), 'per_email': (5, 60)}
+REGISTER_LIMITS = {'per_ip': (20, 3600), 'per_email': (5, 3600)}
+RESET_PASSWORD_LIMITS = {'per_ip': (10, 3600), 'per_email': (5, 3600)}
+
 auth_bp = Blueprint('auth', __name__)  # Define blueprint first
 CORS(auth_bp)  # Apply CORS to the entire auth blueprint
-# In-memory store for revoked tokens (for demonstration purposes)
-blacklist = set()
+@auth_bp.errorhandler(HasherBusy)
+def hasher_busy(e):
+    return jsonify({"error": "Too many sign-ins right now, please retry shortly."}), 503, {"Retry-After": "1"}
+
 @auth_bp.route('/register', methods=['POST'])
 @cross_origin()
+@rate_limiter.limit('register', **REGISTER_LIMITS)
 def register():
     data = request.get_json()
     first_name = data.get('first_name')
@@ -37,6 +51,7 @@ def register():
 
 @auth_bp.route('/login', methods=['POST'])
 @cross_origin(supports_credentials=True) 
+@rate_limiter.limit('login', **LOGIN_LIMITS)
 def login():
     data = request.get_json()
     email = data.get('email')
@@ -46,18 +61,18 @@ def login():
     if not user or not user.check_password(password):
         return jsonify({"error": "Invalid email or password"}), 401
 
+    # Upgrade hashes made with an older PASSWORD_HASH_METHOD while we have the password.
+    if user.password_needs_rehash():
+        user.set_password(password)
+        db.session.commit()
 
-    access_token = create_access_token(identity=str(user.id))
+    # Role and profile travel in the token so routes need not look the user up.
+    access_token = create_access_token(identity=str(user.id), additional_claims=user_claims(user))
 
     return jsonify(
         access_token=access_token,
         role=user.role,
-        user={
-            "id": user.id,
-            "email": user.email,
-            "first_name": user.first_name,
-            "last_name": user.last_name,
-        }
+        user=user_serializer.dump(user)
     ), 200
 
 
@@ -66,12 +81,12 @@ def login():
 @jwt_required()
 @cross_origin()
 def logout():
-    jti = get_jwt()['jti']
-    blacklist.add(jti)
+    revocation_store.revoke(get_jwt())
     return jsonify({"msg": "Successfully logged out"}), 200
 
 @auth_bp.route('/reset-password', methods=['POST'])
 @cross_origin()
+@rate_limiter.limit('reset-password', **RESET_PASSWORD_LIMITS)
 def reset_password():
     data = request.get_json()
     email = data.get('email')
@@ -91,5 +106,6 @@ def reset_password():
     # Update the user's password after hashing it
     user.set_password(new_password)
     db.session.commit()
+    identity_cache.forget(user.id)
 
     return jsonify({"message": "Password updated successfully."}), 200
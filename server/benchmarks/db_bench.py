@@ -0,0 +1,101 @@
+"""Mixed read/write load against SQLite (with and without the pragmas) and PostgreSQL.
+
+Run from the server directory:
+
+    python benchmarks/db_bench.py
+    BENCH_POSTGRES_URL=postgresql://localhost/ireporter_bench python benchmarks/db_bench.py
+
+The PostgreSQL database is emptied, so point it at a scratch instance.
+"""
+import os
+import random
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from flask import Flask
+from sqlalchemy.exc import OperationalError
+from config import engine_options
+from database import configure_engine
+from models import db, RedFlag, User
+
+THREADS = 16
+DURATION_SECONDS = 10
+WRITE_SHARE = 0.2
+SEED_ROWS = 5_000
+
+
+def make_app(uri, pragmas):
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = uri
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = engine_options(uri)
+    db.init_app(app)
+    with app.app_context():
+        if pragmas:
+            configure_engine(db.engine)
+        db.drop_all()
+        db.create_all()
+        db.session.add(User(first_name='Bench', last_name='User', email='bench@example.com', password='x'))
+        db.session.commit()
+        db.session.bulk_insert_mappings(RedFlag, [{
+            'title': f'Report {n}', 'description': 'Seed row', 'location': 'Nairobi',
+            'status': 'draft', 'user_id': 1, 'created_at': datetime.utcnow(),
+        } for n in range(SEED_ROWS)])
+        db.session.commit()
+    return app
+
+
+def worker(app, deadline, latencies, errors):
+    with app.app_context():
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            try:
+                if random.random() < WRITE_SHARE:
+                    db.session.add(RedFlag(title='Load', description='Written by the benchmark',
+                                           location='Nairobi', user_id=1))
+                    db.session.commit()
+                else:
+                    RedFlag.query.order_by(RedFlag.created_at.desc(), RedFlag.id.desc()).limit(50).all()
+            except OperationalError:
+                db.session.rollback()
+                errors.append(1)
+                continue
+            latencies.append(time.perf_counter() - start)
+        db.session.remove()
+
+
+def run(label, uri, pragmas):
+    app = make_app(uri, pragmas)
+    latencies, errors = [], []
+    deadline = time.perf_counter() + DURATION_SECONDS
+    threads = [threading.Thread(target=worker, args=(app, deadline, latencies, errors)) for _ in range(THREADS)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    latencies.sort()
+    p95 = latencies[int(len(latencies) * 0.95)] if latencies else 0
+    print(f'  {label:<22} {len(latencies) / DURATION_SECONDS:9.1f} ops/s  '
+          f'p50 {statistics.median(latencies) * 1000:7.1f} ms  p95 {p95 * 1000:7.1f} ms  '
+          f'{len(errors)} locked')
+
+
+def main():
+    print(f'{THREADS} threads, {int(WRITE_SHARE * 100)}% writes, {DURATION_SECONDS}s each')
+    directory = tempfile.mkdtemp()
+    run('sqlite (defaults)', f'sqlite:///{directory}/plain.db', pragmas=False)
+    run('sqlite (WAL pragmas)', f'sqlite:///{directory}/wal.db', pragmas=True)
+    postgres = os.environ.get('BENCH_POSTGRES_URL')
+    if postgres:
+        run('postgresql (pooled)', postgres, pragmas=False)
+    else:
+        print('  (set BENCH_POSTGRES_URL to include PostgreSQL)')
+
+
+if __name__ == '__main__':
+    main()
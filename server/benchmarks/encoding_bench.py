@@ -0,0 +1,94 @@
+"""Compare bytes on the wire and encode CPU for a page of reports.
+
+Run from the server directory:
+
+    python benchmarks/encoding_bench.py
+
+Each row is one listing body (plain JSON items as today, or the columnar
+form) pushed through each compression codec that is installed.
+"""
+import json
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from flask import Flask
+from compression import CODECS
+from models import db, Report, RedFlag, User
+from serializers import report_serializer
+
+SIZES = (200, 5_000, 50_000)
+REPEAT = 5
+
+
+def seed(count):
+    db.session.query(RedFlag).delete()
+    base = datetime(2025, 1, 1)
+    db.session.bulk_insert_mappings(RedFlag, [{
+        'title': f'Report {n}',
+        'description': f'Road funds diverted in ward {n % 97} ' * 6,
+        'location': 'Nairobi',
+        'latitude': -1.28 + n / 1e5,
+        'longitude': 36.82 - n / 1e5,
+        'status': ('draft', 'under_investigation', 'resolved')[n % 3],
+        'user_id': 1,
+        'image_url': f'/uploads/{n:064x}.jpg',
+        'created_at': base + timedelta(seconds=n),
+        'updated_at': base + timedelta(seconds=n),
+    } for n in range(count)])
+    db.session.commit()
+
+
+def best_of(func):
+    best = None
+    for _ in range(REPEAT):
+        start = time.perf_counter()
+        result = func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return result, best
+
+
+def codecs():
+    found = []
+    for name, codec in CODECS.items():
+        try:
+            found.append(codec())
+        except ImportError:
+            print(f'  ({name} skipped: package not installed)')
+    return found
+
+
+def main():
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite://'
+    db.init_app(app)
+    with app.app_context():
+        db.create_all()
+        db.session.add(User(first_name='Bench', last_name='User', email='bench@example.com', password='x'))
+        db.session.commit()
+        available = codecs()
+        for size in SIZES:
+            seed(size)
+            rows = Report.query.with_entities(*report_serializer.columns).all()
+            bodies = {
+                'json items': lambda: json.dumps({'items': report_serializer.dump_rows(rows)},
+                                                 separators=(',', ':')).encode(),
+                'json columns': lambda: json.dumps(report_serializer.dump_columns(rows),
+                                                   separators=(',', ':')).encode(),
+            }
+            print(f'{size} rows')
+            for label, encode in bodies.items():
+                data, elapsed = best_of(encode)
+                print(f'  {label:<14} {"identity":<8} {len(data):>12,} B  {elapsed * 1000:8.1f} ms encode')
+                for codec in available:
+                    compressed, spent = best_of(lambda: codec.compress(data))
+                    print(f'  {label:<14} {codec.name:<8} {len(compressed):>12,} B  '
+                          f'{(elapsed + spent) * 1000:8.1f} ms encode+compress')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,58 @@
+"""Check how long `import app` and `create_app()` take against a budget.
+
+Run from the server directory:
+
+    python benchmarks/import_bench.py
+
+Exits non-zero when the median import time is over IMPORT_BUDGET_MS, so it
+can gate CI. The slowest modules by self time are listed to show where the
+time went.
+"""
+import os
+import statistics
+import subprocess
+import sys
+
+SERVER = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+RUNS = 5
+TOP = 15
+IMPORT_BUDGET_MS = float(os.environ.get('IMPORT_BUDGET_MS', 800))
+
+
+def importtime(code):
+    """``{module: (self_us, cumulative_us)}`` from one ``python -X importtime`` run."""
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', code],
+                            cwd=SERVER, capture_output=True, text=True, check=True,
+                            env=dict(os.environ, FLASK_DEBUG='1'))
+    modules = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        modules[name.strip()] = (int(self_us), int(cumulative_us))
+    return modules
+
+
+def main():
+    runs = [importtime('import app') for _ in range(RUNS)]
+    median_ms = statistics.median(run['app'][1] for run in runs) / 1000
+    print(f'import app: median {median_ms:.0f} ms over {RUNS} runs (budget {IMPORT_BUDGET_MS:.0f} ms)')
+
+    print(f'slowest {TOP} modules by self time:')
+    last = runs[-1]
+    for name, (self_us, _) in sorted(last.items(), key=lambda item: -item[1][0])[:TOP]:
+        print(f'  {self_us / 1000:7.1f} ms  {name}')
+
+    result = subprocess.run([sys.executable, '-c', 'import time; from app import create_app; '
+                             'start = time.perf_counter(); create_app(); print(time.perf_counter() - start)'],
+                            cwd=SERVER, capture_output=True, text=True, check=True,
+                            env=dict(os.environ, FLASK_DEBUG='1'))
+    print(f'create_app(): {float(result.stdout) * 1000:.0f} ms')
+
+    if median_ms > IMPORT_BUDGET_MS:
+        print('over budget')
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
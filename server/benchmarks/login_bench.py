@@ -0,0 +1,82 @@
+"""Measure /auth/login throughput for each password hash setting.
+
+Run from the server directory:
+
+    python benchmarks/login_bench.py
+"""
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from flask import Flask
+from flask_jwt_extended import JWTManager
+from auth import auth_bp
+from models import db, User
+from passwords import password_hasher
+from ratelimit import rate_limiter
+
+METHODS = (
+    'pbkdf2:sha256:600000',
+    'pbkdf2:sha256:1000000',
+    'scrypt:16384:8:1',
+    'scrypt:32768:8:1',
+)
+LOGINS = 64
+
+
+def make_app():
+    app = Flask(__name__)
+    # A file, not sqlite://: the in-memory database is one connection the clients would share.
+    path = os.path.join(tempfile.mkdtemp(), 'bench.db')
+    app.config['SQLALCHEMY_DATABASE_URI'] = f'sqlite:///{path}'
+    app.config['JWT_SECRET_KEY'] = 'bench-secret-key-bench-secret-key'
+    # Every burst comes from one address and one email; measure hashing, not the limiter.
+    app.config['RATELIMIT_ENABLED'] = False
+    db.init_app(app)
+    JWTManager(app)
+    rate_limiter.init_app(app)
+    app.register_blueprint(auth_bp, url_prefix='/auth')
+    return app
+
+
+def login(app):
+    with app.test_client() as client:
+        response = client.post('/auth/login', json={'email': 'bench@example.com', 'password': 'correct horse'})
+        return response.status_code
+
+
+def main():
+    app = make_app()
+    with app.app_context():
+        db.create_all()
+    print(f'{os.cpu_count()} cores; burst = {LOGINS} logins from as many clients as the pool admits,')
+    print('then the same burst from twice as many, where the overflow is turned away with 503')
+    for method in METHODS:
+        password_hasher.configure(method)
+        with app.app_context():
+            User.query.delete()
+            user = User(first_name='Bench', last_name='User', email='bench@example.com')
+            user.set_password('correct horse')
+            db.session.add(user)
+            db.session.commit()
+
+        start = time.perf_counter()
+        login(app)
+        single = time.perf_counter() - start
+        print(f'{method}: {single * 1000:.1f} ms for one login')
+
+        for clients_count in (password_hasher.capacity, password_hasher.capacity * 2):
+            start = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=clients_count) as clients:
+                codes = list(clients.map(lambda _: login(app), range(LOGINS)))
+            elapsed = time.perf_counter() - start
+            ok = codes.count(200)
+            print(f'  {clients_count:3d} clients {ok / elapsed:8.1f} logins/s  '
+                  f'{codes.count(503):3d} rejected  {codes.count(429):3d} rate limited')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,69 @@
+"""Compare SerializerMixin.to_dict with the precompiled serializers.
+
+Run from the server directory:
+
+    python benchmarks/serializer_bench.py
+"""
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from flask import Flask
+from models import db, RedFlag, User
+from serializers import redflag_serializer
+
+SIZES = (1_000, 10_000, 100_000)
+
+
+def seed(count):
+    db.session.query(RedFlag).delete()
+    base = datetime(2025, 1, 1)
+    db.session.bulk_insert_mappings(RedFlag, [{
+        'title': f'Report {n}',
+        'description': 'Road funds diverted ' * 10,
+        'location': 'Nairobi',
+        'latitude': -1.28,
+        'longitude': 36.82,
+        'status': 'draft',
+        'user_id': 1,
+        'created_at': base + timedelta(seconds=n),
+        'updated_at': base + timedelta(seconds=n),
+    } for n in range(count)])
+    db.session.commit()
+
+
+def timed(label, func):
+    start = time.perf_counter()
+    func()
+    elapsed = time.perf_counter() - start
+    print(f'  {label:<34} {elapsed * 1000:9.1f} ms')
+
+
+def main():
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite://'
+    db.init_app(app)
+    with app.app_context():
+        db.create_all()
+        db.session.add(User(first_name='Bench', last_name='User', email='bench@example.com', password='x'))
+        db.session.commit()
+        for size in SIZES:
+            seed(size)
+            print(f'{size} rows')
+            rows = RedFlag.query.all()
+            timed('to_dict (ORM objects)', lambda: [r.to_dict() for r in rows])
+            timed('dump_many (ORM objects)', lambda: redflag_serializer.dump_many(rows))
+            tuples = RedFlag.query.with_entities(*redflag_serializer.columns).all()
+            timed('dump_rows (row tuples)', lambda: redflag_serializer.dump_rows(tuples))
+            db.session.expunge_all()
+            timed('query + to_dict', lambda: [r.to_dict() for r in RedFlag.query.all()])
+            db.session.expunge_all()
+            timed('query tuples + dump_rows', lambda: redflag_serializer.dump_rows(
+                RedFlag.query.with_entities(*redflag_serializer.columns).all()))
+
+
+if __name__ == '__main__':
+    main()
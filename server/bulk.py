@@ -0,0 +1,128 @@
+from collections import Counter
+from datetime import datetime
+from sqlalchemy import case
+from events import encode_report, record_changes
+from models import db, REPORT_KINDS, Report, Status
+from notifications import queue_status_emails
+from stats import apply_deltas, report_keys, version_keys
+
+MAX_OPERATIONS = 1000
+
+# Reports may only be removed once they are back in one of these states.
+DELETABLE_STATUSES = (Status.DRAFT.value, Status.RESOLVED.value)
+
+
+class BulkError(ValueError):
+    """Raised when the bulk request as a whole is malformed."""
+
+
+def _parse(operation):
+    """Validate one operation, returning ``(kind, id, action, status)`` or an error string."""
+    if not isinstance(operation, dict):
+        return 'Operation must be an object'
+    kind = str(operation.get('type', '')).lower()
+    if kind not in REPORT_KINDS:
+        return 'type must be one of: redflag, intervention'
+    try:
+        report_id = int(operation.get('id'))
+    except (TypeError, ValueError):
+        return 'id must be an integer'
+
+    action = operation.get('action', 'update')
+    if action == 'delete':
+        return kind, report_id, action, None
+    if action != 'update':
+        return 'action must be one of: update, delete'
+    try:
+        status = Status(str(operation.get('status', '')).lower()).value
+    except ValueError:
+        return 'Invalid status value.'
+    return kind, report_id, action, status
+
+
+def apply_operations(operations):
+    """Apply a list of ``{type, id, status}`` / ``{type, id, action: "delete"}`` operations.
+
+    The whole batch is one UPDATE (a CASE over the ids) and one DELETE,
+    all inside the caller's transaction. Returns one result dict per
+    operation, in request order; failed operations do not stop the others.
+    """
+    if not isinstance(operations, list) or not operations:
+        raise BulkError('operations must be a non-empty list')
+    if len(operations) > MAX_OPERATIONS:
+        raise BulkError(f'At most {MAX_OPERATIONS} operations per request')
+
+    results = []
+    parsed = []
+    for operation in operations:
+        item = _parse(operation)
+        if isinstance(operation, dict):
+            result = {'type': operation.get('type'), 'id': operation.get('id')}
+        else:
+            result = {'type': None, 'id': None}
+        if isinstance(item, str):
+            result.update(ok=False, error=item)
+            item = None
+        results.append(result)
+        parsed.append(item)
+
+    wanted = {item[1] for item in parsed if item}
+    current = {}
+    if wanted:
+        current = {row.id: row for row in db.session.query(
+            Report.id, Report.kind, Report.user_id, Report.status, Report.created_at).filter(Report.id.in_(wanted))}
+
+    # Later operations on the same report win, as if applied one by one.
+    updates, deletes = {}, set()
+    for result, item in zip(results, parsed):
+        if not item:
+            continue
+        kind, report_id, action, status = item
+        row = current.get(report_id)
+        if row is None or row.kind != kind or report_id in deletes:
+            result.update(ok=False, error='Report not found.')
+        elif action == 'delete':
+            if updates.get(report_id, row.status) not in DELETABLE_STATUSES:
+                result.update(ok=False, error='Cannot delete report in current status')
+            else:
+                updates.pop(report_id, None)
+                deletes.add(report_id)
+                result.update(ok=True, deleted=True)
+        else:
+            updates[report_id] = status
+            result.update(ok=True, status=status)
+
+    now = datetime.utcnow()
+    if updates:
+        db.session.query(Report).filter(Report.id.in_(updates)).update({
+            Report.status: case(updates, value=Report.id),
+            Report.updated_at: now,
+        }, synchronize_session=False)
+    if deletes:
+        db.session.query(Report).filter(Report.id.in_(deletes)).delete(synchronize_session=False)
+
+    # Query.update/delete skip the ORM flush events that keep the counters current.
+    deltas = Counter()
+    for report_id, status in updates.items():
+        deltas[('status', current[report_id].status)] -= 1
+        deltas[('status', status)] += 1
+    for report_id in deletes:
+        row = current[report_id]
+        deltas.subtract(report_keys(row.kind, row.status, row.user_id, row.created_at))
+    for report_id in (*updates, *deletes):
+        deltas.update(version_keys(current[report_id].kind, current[report_id].user_id))
+    apply_deltas(deltas)
+
+    changes = [('update', encode_report({'id': report_id, 'kind': current[report_id].kind,
+                                         'user_id': current[report_id].user_id,
+                                         'status': status, 'updated_at': now}))
+               for report_id, status in updates.items()]
+    changes.extend(('delete', {'id': report_id, 'kind': current[report_id].kind,
+                               'user_id': current[report_id].user_id})
+                   for report_id in deletes)
+    record_changes(db.session, changes)
+
+    queue_status_emails((Report.__tablename__, report_id, current[report_id].user_id, status)
+                        for report_id, status in updates.items()
+                        if status != current[report_id].status)
+    return results
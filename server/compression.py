@@ -0,0 +1,145 @@
+import logging
+import zlib
+from flask import request
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_ENCODINGS = 'zstd,br,gzip'
+# Bodies below this many bytes are sent as they are; the saving would be lost in headers.
+DEFAULT_MIN_SIZE = 1024
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5
+ZSTD_LEVEL = 3
+
+COMPRESSIBLE = {'application/json', 'application/x-ndjson', 'text/csv', 'text/plain', 'text/html'}
+
+
+def compressible(mimetype):
+    return mimetype in COMPRESSIBLE or (mimetype or '').endswith('+json')
+
+
+class GzipCodec:
+    name = 'gzip'
+
+    def __init__(self, level=GZIP_LEVEL):
+        self.level = level
+
+    def compress(self, data):
+        return zlib.compress(data, self.level, wbits=31)
+
+    def stream(self, chunks):
+        compressor = zlib.compressobj(self.level, zlib.DEFLATED, 31)
+        for chunk in chunks:
+            if chunk:
+                yield compressor.compress(chunk) + compressor.flush(zlib.Z_SYNC_FLUSH)
+        yield compressor.flush()
+
+
+class BrotliCodec:
+    name = 'br'
+
+    def __init__(self, quality=BROTLI_QUALITY):
+        # Optional: br is only offered when the brotli package is installed.
+        import brotli
+        self.brotli = brotli
+        self.quality = quality
+
+    def compress(self, data):
+        return self.brotli.compress(data, quality=self.quality)
+
+    def stream(self, chunks):
+        compressor = self.brotli.Compressor(quality=self.quality)
+        for chunk in chunks:
+            if chunk:
+                yield compressor.process(chunk) + compressor.flush()
+        yield compressor.finish()
+
+
+class ZstdCodec:
+    name = 'zstd'
+
+    def __init__(self, level=ZSTD_LEVEL):
+        # Optional: zstd is only offered when the zstandard package is installed.
+        import zstandard
+        self.zstandard = zstandard
+        self.level = level
+
+    def compress(self, data):
+        # Compressor objects are not thread-safe, so each response gets its own.
+        return self.zstandard.ZstdCompressor(level=self.level).compress(data)
+
+    def stream(self, chunks):
+        compressor = self.zstandard.ZstdCompressor(level=self.level).compressobj()
+        for chunk in chunks:
+            if chunk:
+                yield compressor.compress(chunk) + compressor.flush(self.zstandard.COMPRESSOBJ_FLUSH_BLOCK)
+        yield compressor.flush()
+
+
+CODECS = {codec.name: codec for codec in (GzipCodec, BrotliCodec, ZstdCodec)}
+
+
+class Compressor:
+    """Compresses JSON, NDJSON and CSV responses with the best encoding the client accepts.
+
+    Buffered bodies under ``COMPRESS_MIN_SIZE`` bytes are left alone.
+    Streamed bodies (the exports) are compressed chunk by chunk, flushing
+    after each one, so the client still receives rows as they are read.
+    Files sent by ``send_from_directory`` pass through untouched.
+    """
+
+    def __init__(self):
+        self.codecs = {}
+        self.preference = []
+        self.min_size = DEFAULT_MIN_SIZE
+
+    def init_app(self, app):
+        self.codecs = {}
+        for name in app.config.get('COMPRESS_ENCODINGS', DEFAULT_ENCODINGS).split(','):
+            name = name.strip()
+            if not name:
+                continue
+            if name not in CODECS:
+                raise ValueError(f'Unknown COMPRESS_ENCODINGS entry: {name}')
+            try:
+                self.codecs[name] = CODECS[name]()
+            except ImportError:
+                logger.info('%s compression is unavailable; its package is not installed', name)
+        # Server order breaks ties between encodings the client weighs equally.
+        self.preference = list(self.codecs)
+        self.min_size = app.config.get('COMPRESS_MIN_SIZE', DEFAULT_MIN_SIZE)
+        app.extensions['compression'] = self
+        app.after_request(self.compress)
+
+    def negotiate(self):
+        name = request.accept_encodings.best_match(self.preference)
+        return self.codecs.get(name)
+
+    def compress(self, response):
+        if (not self.codecs or response.status_code < 200 or response.status_code in (204, 304)
+                or response.direct_passthrough or 'Content-Encoding' in response.headers
+                or not compressible(response.mimetype)):
+            return response
+        response.vary.add('Accept-Encoding')
+        codec = self.negotiate()
+        if codec is None:
+            return response
+
+        if response.is_streamed:
+            response.response = codec.stream(response.iter_encoded())
+            response.headers.pop('Content-Length', None)
+        else:
+            data = response.get_data()
+            if len(data) < self.min_size:
+                return response
+            response.set_data(codec.compress(data))
+        response.headers['Content-Encoding'] = codec.name
+
+        # The bytes now differ per encoding, so a strong validator no longer holds.
+        etag, weak = response.get_etag()
+        if etag and not weak:
+            response.set_etag(etag, weak=True)
+        return response
+
+
+compressor = Compressor()
@@ -0,0 +1,47 @@
+import hashlib
+from flask import Response, request
+from werkzeug.http import is_resource_modified
+from stats import read_version
+
+# Query-string keys that do not change what a listing returns.
+IGNORED_ARGS = {'_'}
+
+
+def listing_etag(args, scope):
+    """A validator for a report listing, from its scope's change marker.
+
+    Every write to a report bumps the marker of each scope that can list it
+    (``all``, ``kind:<kind>`` and its owner's ``user:<id>``; see
+    stats.version_keys), so checking a listing is one primary-key read
+    however many rows it covers. The query string is mixed in, so each
+    page and filter gets its own tag; a write anywhere in the scope
+    invalidates them all.
+    """
+    params = sorted((key, value) for key, value in args.items(multi=True) if key not in IGNORED_ARGS)
+    raw = f'{scope}|{read_version(scope)}|{params}'
+    return hashlib.sha1(raw.encode()).hexdigest()
+
+
+def report_etag(report):
+    return f'{report.kind}-{report.id}-{report.updated_at.isoformat() if report.updated_at else ""}'
+
+
+def conditional(etag, render, last_modified=None):
+    """Answer 304 when the request's If-None-Match / If-Modified-Since still match.
+
+    ``render`` builds the full response and is only called on a miss, so an
+    unchanged resource costs the validator lookup and nothing else. ETags are
+    weak: the body is equivalent, not byte-for-byte fixed.
+    """
+    if is_resource_modified(request.environ, etag=etag, last_modified=last_modified):
+        response = render()
+    else:
+        response = Response(status=304)
+    response.set_etag(etag, weak=True)
+    if last_modified is not None:
+        response.last_modified = last_modified
+    # Responses depend on the bearer token; let clients keep them but always revalidate.
+    response.cache_control.private = True
+    response.cache_control.no_cache = True
+    response.vary.add('Authorization')
+    return response
@@ -0,0 +1,93 @@
+from datetime import timedelta
+import os
+from dotenv import load_dotenv
+
+# Values from a .env file next to the app; real environment variables win.
+load_dotenv()
+
+
+def _flag(name, default):
+    return os.environ.get(name, default).lower() == 'true'
+
+
+def database_uri():
+    uri = os.environ.get('DATABASE_URL', 'sqlite:///reports.db')
+    # Heroku/Render hand out postgres://, which SQLAlchemy no longer accepts.
+    if uri.startswith('postgres://'):
+        uri = 'postgresql://' + uri[len('postgres://'):]
+    return uri
+
+
+def engine_options(uri):
+    """Pool settings for PostgreSQL; SQLite gets its pragmas in database.py instead."""
+    if uri.startswith('postgresql'):
+        return {
+            'pool_size': int(os.environ.get('DB_POOL_SIZE', 10)),
+            'max_overflow': int(os.environ.get('DB_MAX_OVERFLOW', 20)),
+            'pool_timeout': int(os.environ.get('DB_POOL_TIMEOUT', 30)),
+            # Drop connections the server or a proxy may have closed behind our back.
+            'pool_recycle': int(os.environ.get('DB_POOL_RECYCLE', 1800)),
+            'pool_pre_ping': _flag('DB_POOL_PRE_PING', 'true'),
+        }
+    return {}
+
+
+class Config:
+    SQLALCHEMY_DATABASE_URI = database_uri()
+    SQLALCHEMY_ENGINE_OPTIONS = engine_options(SQLALCHEMY_DATABASE_URI)
+    SQLALCHEMY_TRACK_MODIFICATIONS = False
+    # SQLite only: milliseconds a writer waits for the lock before "database is locked".
+    SQLITE_BUSY_TIMEOUT = int(os.environ.get('SQLITE_BUSY_TIMEOUT', 5000))
+
+    UPLOAD_FOLDER = os.environ.get('UPLOAD_FOLDER', 'uploads')
+    ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif', 'mp4', 'mov', 'avi'}
+    # Signs sessions, JWTs and event-stream tokens. Required unless FLASK_DEBUG
+    # or TESTING is on, where create_app falls back to a random per-process key.
+    SECRET_KEY = os.environ.get('SECRET_KEY')
+    JWT_ACCESS_TOKEN_EXPIRES = timedelta(hours=int(os.environ.get('JWT_ACCESS_TOKEN_HOURS', 12)))
+    # Werkzeug hash method and cost, e.g. scrypt:32768:8:1 or pbkdf2:sha256:600000;
+    # existing hashes are upgraded at their next login.
+    PASSWORD_HASH_METHOD = os.environ.get('PASSWORD_HASH_METHOD', 'scrypt:32768:8:1')
+    PASSWORD_HASH_WORKERS = int(os.environ.get('PASSWORD_HASH_WORKERS', 0)) or None
+    # Reverse proxies in front of the app whose X-Forwarded-For/-Proto are
+    # trusted; Render (which sets RENDER) adds one. Rate limits key on the
+    # client address this recovers, so never count hops a client can spoof.
+    PROXY_FIX_X_FOR = int(os.environ.get('PROXY_FIX_X_FOR', 1 if os.environ.get('RENDER') else 0))
+    # Auth rate limits: per-process counters, or 'redis' to share them between workers
+    RATELIMIT_BACKEND = os.environ.get('RATELIMIT_BACKEND', 'memory')
+    RATELIMIT_REDIS_URL = os.environ.get('RATELIMIT_REDIS_URL', 'redis://localhost:6379/1')
+    # Logged-out tokens: 'sql' (revoked_tokens table) or 'redis' (REVOCATION_REDIS_URL)
+    REVOCATION_BACKEND = os.environ.get('REVOCATION_BACKEND', 'sql')
+    REVOCATION_REDIS_URL = os.environ.get('REVOCATION_REDIS_URL', 'redis://localhost:6379/0')
+    # Let the front server send media: X-Sendfile (Apache, lighttpd) or an nginx
+    # internal location such as /protected-uploads/ aliased to UPLOAD_FOLDER.
+    USE_X_SENDFILE = _flag('USE_X_SENDFILE', 'false')
+    MEDIA_ACCEL_REDIRECT_PREFIX = os.environ.get('MEDIA_ACCEL_REDIRECT_PREFIX')
+
+    # How long a POST's Idempotency-Key is remembered and its response replayed.
+    IDEMPOTENCY_TTL_HOURS = int(os.environ.get('IDEMPOTENCY_TTL_HOURS', 24))
+
+    # Open GET /reports/events streams per worker process; more are sent a
+    # busy event and retry later, so streams cannot take every gunicorn thread.
+    EVENT_STREAMS_MAX = int(os.environ.get('EVENT_STREAMS_MAX', 4))
+    # Report changes kept for streams resuming with Last-Event-ID; older ones
+    # are deleted by `flask prune-events`, which should run on a schedule.
+    EVENT_LOG_HOURS = int(os.environ.get('EVENT_LOG_HOURS', 24))
+
+    # Response compression, in order of preference; br and zstd need the
+    # brotli and zstandard packages and are skipped without them.
+    COMPRESS_ENCODINGS = os.environ.get('COMPRESS_ENCODINGS', 'zstd,br,gzip')
+    COMPRESS_MIN_SIZE = int(os.environ.get('COMPRESS_MIN_SIZE', 1024))
+
+    # MAIL_SERVER/MAIL_PORT/MAIL_USE_TLS can point at a local SMTP stand-in
+    # (e.g. `python -m aiosmtpd -n -l localhost:8025`) for testing.
+    MAIL_SERVER = os.environ.get('MAIL_SERVER', 'smtp.gmail.com')
+    MAIL_PORT = int(os.environ.get('MAIL_PORT', 587))
+    MAIL_USE_TLS = _flag('MAIL_USE_TLS', 'true')
+    MAIL_USERNAME = os.environ.get('MAIL_USERNAME')
+    MAIL_PASSWORD = os.environ.get('MAIL_PASSWORD')
+    MAIL_DEFAULT_SENDER = os.environ.get('MAIL_DEFAULT_SENDER', MAIL_USERNAME)
+    # Mail is off without credentials: emails wait in the outbox until they are
+    # set. OUTBOX_WORKER_ENABLED=true (with MAIL_DEFAULT_SENDER) sends anyway,
+    # e.g. through a stand-in that needs no login.
+    OUTBOX_WORKER_ENABLED = _flag('OUTBOX_WORKER_ENABLED', 'true' if MAIL_USERNAME and MAIL_PASSWORD else 'false')
@@ -0,0 +1,24 @@
+from sqlalchemy import event
+
+
+def _sqlite_pragmas(busy_timeout):
+    def on_connect(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        # WAL lets readers carry on while one writer commits; NORMAL only
+        # syncs at checkpoints, which is safe in WAL mode.
+        cursor.execute('PRAGMA journal_mode=WAL')
+        cursor.execute('PRAGMA synchronous=NORMAL')
+        cursor.execute(f'PRAGMA busy_timeout={int(busy_timeout)}')
+        cursor.close()
+    return on_connect
+
+
+def configure_engine(engine, busy_timeout=5000):
+    """Per-connection tuning for the app's engine; PostgreSQL needs none beyond its pool options."""
+    if engine.dialect.name == 'sqlite':
+        event.listen(engine, 'connect', _sqlite_pragmas(busy_timeout))
+
+
+def init_app(app, db):
+    with app.app_context():
+        configure_engine(db.engine, app.config.get('SQLITE_BUSY_TIMEOUT', 5000))
@@ -0,0 +1,249 @@
+from datetime import datetime, timedelta
+import json
+import threading
+import time
+from itsdangerous import BadSignature, URLSafeSerializer
+from sqlalchemy import delete, event, func, insert
+from models import db, Report, ReportChange
+from serializers import report_serializer
+
+HEARTBEAT_SECONDS = 15
+POLL_SECONDS = 1
+# Streams end after this long so a worker thread is never held indefinitely.
+# EventSource reconnects to the same URL with Last-Event-ID; the stream
+# token in that URL stays valid until the JWT it was minted from expires.
+STREAM_SECONDS = 300
+RETRY_MS = 3000
+# The retry sent with the busy event, when every stream slot is taken.
+BUSY_RETRY_MS = 15000
+# A stream whose token expires within this of its end sends a reauth event
+# instead of letting EventSource reconnect with a token about to lapse.
+REAUTH_SECONDS = 30
+READ_BATCH = 500
+DEFAULT_MAX_STREAMS = 4
+DEFAULT_LOG_HOURS = 24
+TOKEN_SALT = 'report-events'
+# With concurrent writers a later id can commit before an earlier one, so a
+# stream remembers the ids it skipped and delivers them if they turn up
+# within GAP_SECONDS; ids that never do were rolled back. A transaction
+# that commits later than that is not delivered to streams already past it.
+GAP_SECONDS = 300
+MAX_GAPS = 50
+
+
+def encode_report(fields):
+    """Encode a (possibly partial) dict of report columns the way the serializer encodes a row."""
+    return {name: fields[name] if encoder is None else encoder(fields[name])
+            for name, encoder in report_serializer.fields if name in fields}
+
+
+def record_changes(session, changes):
+    """Write ``(type, report_dict)`` changes to report_changes on ``session``'s connection.
+
+    They commit or roll back with the writes that produced them. The ORM
+    hook below calls this for every flush; code that writes reports with
+    Core statements (bulk.py, ingest.py) calls it directly. A report dict
+    always holds ``id``, ``kind`` and ``user_id``; updates may carry only
+    the fields that changed. Old changes are removed by ``flask
+    prune-events`` (ChangeFeed.prune), not here.
+    """
+    if not changes:
+        return
+    now = datetime.utcnow()
+    session.connection().execute(insert(ReportChange), [
+        {'type': change_type, 'user_id': report.get('user_id'), 'created_at': now,
+         'data': json.dumps(report, separators=(',', ':'))}
+        for change_type, report in changes
+    ])
+
+
+def format_cursor(after, gaps):
+    """The event id for a stream position: ``after``, then any pending ``gap@deadline`` ids."""
+    if not gaps:
+        return str(after)
+    return f'{after}:' + ','.join(f'{gap}@{int(deadline)}' for gap, deadline in sorted(gaps.items()))
+
+
+def parse_cursor(cursor):
+    """``(after, gaps)`` from an event id made by format_cursor; ValueError if it is not one."""
+    after, _, pending = cursor.partition(':')
+    if not after.isdigit():
+        raise ValueError(cursor)
+    now = time.time()
+    gaps = {}
+    for entry in filter(None, pending.split(',')):
+        gap, _, deadline = entry.partition('@')
+        if not (gap.isdigit() and deadline.isdigit()) or int(gap) >= int(after):
+            raise ValueError(cursor)
+        if now < int(deadline):
+            gaps[int(gap)] = min(int(deadline), now + GAP_SECONDS)
+    return int(after), dict(sorted(gaps.items())[-MAX_GAPS:])
+
+
+class ChangeFeed:
+    """Report changes behind ``GET /reports/events``, shared by every worker through the database.
+
+    Each committed change is a report_changes row. A stream polls for ids
+    after the last one it read, plus the skipped ids it is still waiting
+    for (see ``GAP_SECONDS``); the event id records both, so a client may
+    reconnect to any worker with ``Last-Event-ID`` and resume. If that
+    position has been pruned, or is not one of ours, the client is sent a
+    ``reset`` event and should reload. Each process serves at most
+    ``EVENT_STREAMS_MAX`` streams at once.
+    """
+
+    def __init__(self):
+        self.max_streams = DEFAULT_MAX_STREAMS
+        self.retention = timedelta(hours=DEFAULT_LOG_HOURS)
+        self._slots = threading.BoundedSemaphore(self.max_streams)
+        self._signer = None
+
+    def init_app(self, app):
+        self.max_streams = app.config.get('EVENT_STREAMS_MAX', DEFAULT_MAX_STREAMS)
+        self.retention = timedelta(hours=app.config.get('EVENT_LOG_HOURS', DEFAULT_LOG_HOURS))
+        self._slots = threading.BoundedSemaphore(self.max_streams)
+        self._signer = URLSafeSerializer(app.config['SECRET_KEY'], salt=TOKEN_SALT)
+        app.extensions['change_feed'] = self
+
+    def issue_token(self, user_id, jwt_payload):
+        """A token that opens one user's stream, good for nothing else, until the JWT behind it expires."""
+        return self._signer.dumps([user_id, jwt_payload['jti'], jwt_payload['exp']])
+
+    def token_claims(self, token):
+        """``{'user_id', 'jti', 'exp'}`` of a stream token, or None if it is invalid or expired."""
+        try:
+            user_id, jti, exp = self._signer.loads(token)
+        except (BadSignature, TypeError, ValueError):
+            return None
+        if not isinstance(user_id, int) or not isinstance(exp, (int, float)) or exp <= time.time():
+            return None
+        return {'user_id': user_id, 'jti': jti, 'exp': exp}
+
+    def acquire(self):
+        """Claim a stream slot; False when this process already serves ``max_streams``."""
+        return self._slots.acquire(blocking=False)
+
+    def release(self):
+        self._slots.release()
+
+    def position(self, last_event_id):
+        """``(after, gaps, in_log)`` to resume from; ``in_log`` is False when the client missed changes."""
+        first, latest = db.session.query(func.min(ReportChange.id), func.max(ReportChange.id)).one()
+        latest = latest or 0
+        if not last_event_id:
+            return latest, {}, True
+        try:
+            after, gaps = parse_cursor(last_event_id)
+        except ValueError:
+            return latest, {}, False
+        if after > latest or (first is not None and after < first - 1):
+            return latest, {}, False
+        if first is not None:
+            gaps = {gap: deadline for gap, deadline in gaps.items() if gap >= first}
+        return after, gaps, True
+
+    def read(self, after, gaps):
+        """Committed changes after ``after``, or in ``gaps``, as ``(cursor, type, user_id, data)``.
+
+        ``gaps`` maps ids skipped so far to the time to stop waiting for
+        them, and is updated in place: ids that turn up are delivered and
+        removed, newly skipped ones are added and expired ones dropped.
+        Each change carries the cursor to resume from once it is sent.
+        """
+        now = time.time()
+        for gap in [gap for gap, deadline in gaps.items() if deadline <= now]:
+            del gaps[gap]
+        condition = ReportChange.id > after
+        if gaps:
+            condition = condition | ReportChange.id.in_(list(gaps))
+        rows = (db.session.query(ReportChange.id, ReportChange.type, ReportChange.user_id, ReportChange.data)
+                .filter(condition)
+                .order_by(ReportChange.id)
+                .limit(READ_BATCH)
+                .all())
+        changes = []
+        for change_id, change_type, user_id, data in rows:
+            if change_id in gaps:
+                del gaps[change_id]
+            else:
+                for missing in range(max(after + 1, change_id - MAX_GAPS), change_id):
+                    gaps[missing] = now + GAP_SECONDS
+                for gap in sorted(gaps)[:-MAX_GAPS]:
+                    del gaps[gap]
+                after = change_id
+            changes.append((format_cursor(after, gaps), change_type, user_id, data))
+        return after, changes
+
+    def stream(self, after, gaps, in_log, user_id=None, expires_at=None, lifetime=STREAM_SECONDS):
+        """Yield Server-Sent Events; with ``user_id`` only that user's reports are sent.
+
+        The stream ends after ``lifetime`` seconds, or when its token
+        expires at ``expires_at``; if the token will not outlast the
+        reconnect, a ``reauth`` event tells the client to mint a new one
+        and reopen with ``?last_event_id=``. The session is removed after
+        each poll so an idle stream holds no database connection.
+        """
+        yield f'retry: {RETRY_MS}\n\n'
+        if not in_log:
+            yield f'id: {format_cursor(after, gaps)}\nevent: reset\ndata: {{}}\n\n'
+        if expires_at is not None:
+            lifetime = min(lifetime, expires_at - time.time())
+        deadline = time.monotonic() + lifetime
+        quiet_since = time.monotonic()
+        while True:
+            try:
+                after, changes = self.read(after, gaps)
+            finally:
+                db.session.remove()
+            for cursor, change_type, owner_id, data in changes:
+                if user_id is None or owner_id == user_id:
+                    quiet_since = time.monotonic()
+                    yield f'id: {cursor}\nevent: {change_type}\ndata: {data}\n\n'
+            now = time.monotonic()
+            if now >= deadline:
+                break
+            if now - quiet_since >= HEARTBEAT_SECONDS:
+                quiet_since = now
+                yield ': keep-alive\n\n'
+            if len(changes) < READ_BATCH:
+                time.sleep(min(POLL_SECONDS, deadline - now))
+        if expires_at is not None and expires_at - time.time() < REAUTH_SECONDS:
+            yield f'id: {format_cursor(after, gaps)}\nevent: reauth\ndata: {{}}\n\n'
+
+    def busy(self):
+        """The whole response when every stream slot is taken: EventSource retries after ``BUSY_RETRY_MS``."""
+        return f'retry: {BUSY_RETRY_MS}\nevent: busy\ndata: {{}}\n\n'
+
+    def prune(self):
+        """Delete changes older than ``EVENT_LOG_HOURS``; returns how many. Run by ``flask prune-events``."""
+        cutoff = datetime.utcnow() - self.retention
+        # The newest id is kept so streams resuming after it are not sent a reset.
+        latest = db.session.query(func.max(ReportChange.id)).scalar()
+        result = db.session.execute(delete(ReportChange).where(ReportChange.created_at < cutoff,
+                                                               ReportChange.id != latest))
+        db.session.commit()
+        return result.rowcount
+
+
+change_feed = ChangeFeed()
+
+
+def _after_flush(session, flush_context):
+    changes = []
+    with session.no_autoflush:
+        for obj in session.new:
+            if isinstance(obj, Report):
+                changes.append(('create', report_serializer.dump(obj)))
+        for obj in session.dirty:
+            if isinstance(obj, Report) and session.is_modified(obj):
+                changes.append(('update', report_serializer.dump(obj)))
+        for obj in session.deleted:
+            if isinstance(obj, Report):
+                changes.append(('delete', {'id': obj.id, 'kind': obj.kind, 'user_id': obj.user_id}))
+    record_changes(session, changes)
+
+
+def register_change_feed(session=db.session):
+    """Log every insert, update and delete of a Report to report_changes, in its own transaction."""
+    if not event.contains(session, 'after_flush', _after_flush):
+        event.listen(session, 'after_flush', _after_flush)
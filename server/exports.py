@@ -0,0 +1,65 @@
+import csv
+import io
+import json
+from models import db
+
+CHUNK_SIZE = 1000
+
+EXPORT_FORMATS = {
+    'ndjson': 'application/x-ndjson',
+    'json': 'application/json',
+    'csv': 'text/csv',
+}
+
+
+def _chunks(serializer, query):
+    """Yield lists of encoded rows, ``CHUNK_SIZE`` at a time.
+
+    Rows are read through a server-side cursor (``yield_per``), so only one
+    chunk is held in memory at any point.
+    """
+    statement = query.statement.execution_options(yield_per=CHUNK_SIZE)
+    for partition in db.session.execute(statement).partitions():
+        yield serializer.dump_rows(partition)
+
+
+def _dumps(item):
+    return json.dumps(item, separators=(',', ':'))
+
+
+def stream_ndjson(serializer, query):
+    for items in _chunks(serializer, query):
+        yield ''.join(_dumps(item) + '\n' for item in items)
+
+
+def stream_json(serializer, query):
+    yield '['
+    first = True
+    for items in _chunks(serializer, query):
+        body = ','.join(_dumps(item) for item in items)
+        yield body if first else ',' + body
+        first = False
+    yield ']'
+
+
+def stream_csv(serializer, query):
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=serializer.names)
+    writer.writeheader()
+    for items in _chunks(serializer, query):
+        writer.writerows(items)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    yield buffer.getvalue()
+
+
+STREAMERS = {
+    'ndjson': stream_ndjson,
+    'json': stream_json,
+    'csv': stream_csv,
+}
+
+
+def stream_export(export_format, serializer, query):
+    return STREAMERS[export_format](serializer, query)
@@ -0,0 +1,8 @@
+from flask_jwt_extended import JWTManager
+from flask_mail import Mail
+from flask_migrate import Migrate
+
+# Created unbound; create_app() attaches them to each application.
+jwt = JWTManager()
+migrate = Migrate()
+mail = Mail()
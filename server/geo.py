@@ -0,0 +1,241 @@
+import math
+from sqlalchemy import and_, func, or_
+
+BASE32 = '0123456789bcdefghjkmnpqrstuvwxyz'
+GEOHASH_PRECISION = 12
+EARTH_RADIUS_M = 6371008.8
+
+DEFAULT_RADIUS_M = 1000
+MAX_RADIUS_M = 100000
+DEFAULT_NEAR_LIMIT = 50
+MAX_NEAR_LIMIT = 200
+# Nearest-report search starts this close and doubles the ring until it is
+# full, reading at most this many candidates per requested result.
+FIRST_RING_M = 250
+RING_CANDIDATES_PER_RESULT = 8
+
+# Upper bounds on the geohash cells used to cover a query area and on the
+# markers a map request returns before falling back to clusters.
+MAX_COVER_CELLS = 16
+MAX_CLUSTERS = 64
+MAX_MARKERS = 200
+# Below this zoom level map requests are always clustered.
+CLUSTER_BELOW_ZOOM = 12
+
+
+class GeoError(ValueError):
+    """Raised when a location query string cannot be parsed."""
+
+
+def encode_geohash(latitude, longitude, precision=GEOHASH_PRECISION):
+    lat_range = [-90.0, 90.0]
+    lng_range = [-180.0, 180.0]
+    chars = []
+    bits = 0
+    value = 0
+    even = True
+    while len(chars) < precision:
+        bounds, coordinate = (lng_range, longitude) if even else (lat_range, latitude)
+        mid = (bounds[0] + bounds[1]) / 2
+        value <<= 1
+        if coordinate >= mid:
+            value |= 1
+            bounds[0] = mid
+        else:
+            bounds[1] = mid
+        even = not even
+        bits += 1
+        if bits == 5:
+            chars.append(BASE32[value])
+            bits = 0
+            value = 0
+    return ''.join(chars)
+
+
+def _cell_size(precision):
+    """``(height, width)`` in degrees of a geohash cell of ``precision`` characters."""
+    lng_bits = (5 * precision + 1) // 2
+    lat_bits = 5 * precision // 2
+    return 180.0 / 2 ** lat_bits, 360.0 / 2 ** lng_bits
+
+
+def _cells(box, precision):
+    """Every geohash prefix of ``precision`` characters that overlaps ``box``."""
+    south, west, north, east = box
+    height, width = _cell_size(precision)
+    lat = math.floor((south + 90) / height) * height - 90
+    cells = set()
+    while lat <= north and lat < 90:
+        lng = math.floor((west + 180) / width) * width - 180
+        while lng <= east and lng < 180:
+            cells.add(encode_geohash(lat + height / 2, lng + width / 2, precision))
+            lng += width
+        lat += height
+    return cells
+
+
+def _cell_count(box, precision):
+    south, west, north, east = box
+    height, width = _cell_size(precision)
+    return ((math.floor((north + 90) / height) - math.floor((south + 90) / height) + 1)
+            * (math.floor((east + 180) / width) - math.floor((west + 180) / width) + 1))
+
+
+def _finest_precision(box, max_cells):
+    precision = 1
+    while precision < GEOHASH_PRECISION and _cell_count(box, precision + 1) <= max_cells:
+        precision += 1
+    return precision
+
+
+def within_box(model, box):
+    """Filter matching reports inside ``box`` (south, west, north, east).
+
+    The box is first narrowed to a handful of geohash ranges, which the index
+    on ``model.geohash`` can serve, then checked exactly against the
+    coordinates.
+    """
+    south, west, north, east = box
+    prefixes = sorted(_cells(box, _finest_precision(box, MAX_COVER_CELLS)))
+    # '~' sorts after every geohash character, so [prefix, prefix~) is the cell.
+    return and_(
+        or_(*(and_(model.geohash >= prefix, model.geohash < prefix + '~') for prefix in prefixes)),
+        model.latitude.between(south, north),
+        model.longitude.between(west, east),
+    )
+
+
+def distance_m(lat1, lng1, lat2, lng2):
+    """Great-circle (haversine) distance in metres."""
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    d_phi = phi2 - phi1
+    d_lambda = math.radians(lng2 - lng1)
+    a = math.sin(d_phi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(d_lambda / 2) ** 2
+    return 2 * EARTH_RADIUS_M * math.asin(math.sqrt(a))
+
+
+def radius_box(latitude, longitude, radius):
+    """The smallest (south, west, north, east) box holding a circle of ``radius`` metres."""
+    d_lat = math.degrees(radius / EARTH_RADIUS_M)
+    cos_lat = math.cos(math.radians(latitude))
+    d_lng = 180.0 if cos_lat < 1e-6 else min(180.0, d_lat / cos_lat)
+    return (max(-90.0, latitude - d_lat), max(-180.0, longitude - d_lng),
+            min(90.0, latitude + d_lat), min(180.0, longitude + d_lng))
+
+
+def _parse_float(value, name, low, high):
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        raise GeoError(f'{name} must be a number')
+    if not low <= number <= high:
+        raise GeoError(f'{name} must be between {low:g} and {high:g}')
+    return number
+
+
+def parse_point(args):
+    """Read ``?lat=&lng=&radius=`` into ``(latitude, longitude, radius_m)``."""
+    latitude = _parse_float(args.get('lat'), 'lat', -90, 90)
+    longitude = _parse_float(args.get('lng'), 'lng', -180, 180)
+    radius = args.get('radius')
+    radius = DEFAULT_RADIUS_M if radius in (None, '') else _parse_float(radius, 'radius', 0, MAX_RADIUS_M)
+    return latitude, longitude, radius
+
+
+def parse_box(args):
+    """Read ``?bbox=west,south,east,north`` into ``(south, west, north, east)``."""
+    parts = (args.get('bbox') or '').split(',')
+    if len(parts) != 4:
+        raise GeoError('bbox must be west,south,east,north')
+    west = _parse_float(parts[0], 'west', -180, 180)
+    south = _parse_float(parts[1], 'south', -90, 90)
+    east = _parse_float(parts[2], 'east', -180, 180)
+    north = _parse_float(parts[3], 'north', -90, 90)
+    if south > north:
+        raise GeoError('bbox south must not be above north')
+    if west > east:
+        raise GeoError('bbox must not cross the antimeridian')
+    return south, west, north, east
+
+
+def parse_zoom(args):
+    zoom = args.get('zoom')
+    if zoom in (None, ''):
+        return None
+    return _parse_float(zoom, 'zoom', 0, 30)
+
+
+def parse_near_limit(args):
+    value = args.get('limit')
+    if value in (None, ''):
+        return DEFAULT_NEAR_LIMIT
+    try:
+        limit = int(value)
+    except ValueError:
+        raise GeoError('limit must be an integer')
+    if limit < 1:
+        raise GeoError('limit must be positive')
+    return min(limit, MAX_NEAR_LIMIT)
+
+
+def _ring_candidates(query, model, point, ring, cap):
+    """Up to ``cap`` ``(id, latitude, longitude)`` rows in the box around a ring of ``ring`` metres.
+
+    The database orders them by a flat-earth approximation of the distance,
+    so when the cap truncates the box it keeps the closest rows.
+    """
+    latitude, longitude, _ = point
+    scale = math.cos(math.radians(latitude)) ** 2
+    d_lat = model.latitude - latitude
+    d_lng = model.longitude - longitude
+    return (query.filter(within_box(model, radius_box(latitude, longitude, ring)))
+            .with_entities(model.id, model.latitude, model.longitude)
+            .order_by(d_lat * d_lat + d_lng * d_lng * scale, model.id)
+            .limit(cap)
+            .all())
+
+
+def nearest(query, model, point, limit):
+    """Rows of ``query`` within ``radius`` of the point, nearest first, with their distance.
+
+    Searches rings of growing size, starting at ``FIRST_RING_M``, reading
+    only ids and coordinates; a ring is enough once it holds ``limit``
+    reports closer than its own radius, since nothing outside it can beat
+    those. Only the winning rows are then loaded in full.
+
+    Returns ``[(distance_m, row), ...]``.
+    """
+    latitude, longitude, radius = point
+    cap = limit * RING_CANDIDATES_PER_RESULT
+    ring = min(radius, FIRST_RING_M)
+    while True:
+        candidates = _ring_candidates(query, model, point, ring, cap)
+        found = []
+        for report_id, lat, lng in candidates:
+            distance = distance_m(latitude, longitude, lat, lng)
+            if distance <= ring:
+                found.append((distance, report_id))
+        if len(found) >= limit or len(candidates) == cap or ring >= radius:
+            break
+        ring = min(radius, ring * 2)
+
+    found.sort()
+    found = found[:limit]
+    rows = {row.id: row for row in query.filter(model.id.in_([report_id for _, report_id in found]))}
+    return [(distance, rows[report_id]) for distance, report_id in found if report_id in rows]
+
+
+def clusters(query, model, box):
+    """Group the rows of ``query`` inside ``box`` into at most ``MAX_CLUSTERS`` geohash cells."""
+    precision = _finest_precision(box, MAX_CLUSTERS)
+    cell = func.substr(model.geohash, 1, precision)
+    rows = (query.filter(within_box(model, box))
+            .with_entities(cell, func.count(), func.avg(model.latitude), func.avg(model.longitude))
+            .group_by(cell)
+            .order_by(cell))
+    return [{'geohash': geohash, 'count': count, 'latitude': latitude, 'longitude': longitude}
+            for geohash, count, latitude, longitude in rows]
+
+
+def should_cluster(zoom):
+    return zoom is not None and zoom < CLUSTER_BELOW_ZOOM
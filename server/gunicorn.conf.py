@@ -0,0 +1,24 @@
+# gunicorn -c gunicorn.conf.py wsgi:app
+import os
+
+bind = os.environ.get('GUNICORN_BIND', '0.0.0.0:5000')
+workers = int(os.environ.get('WEB_CONCURRENCY', 2))
+# Threads, so an open /reports/events stream pins one thread, not a worker.
+# Each worker serves at most EVENT_STREAMS_MAX streams (see config.py) and
+# turns more away with a busy event, which keeps the other threads free.
+# Streams read the report_changes table, so any worker can serve any client.
+worker_class = 'gthread'
+threads = int(os.environ.get('GUNICORN_THREADS', 8))
+
+# Import the app once in the master so workers fork with the modules, routes
+# and config already loaded instead of each importing them again.
+preload_app = True
+
+
+def post_fork(server, worker):
+    # Connections opened in the master must not be shared with the children;
+    # close=False leaves the parent's sockets alone and only drops the pool.
+    from models import db
+    from wsgi import app
+    with app.app_context():
+        db.engine.dispose(close=False)
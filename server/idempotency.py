@@ -0,0 +1,139 @@
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from functools import wraps
+import hashlib
+import threading
+from flask import current_app, jsonify, make_response, request
+from flask_jwt_extended import current_user
+from sqlalchemy.exc import IntegrityError
+from models import db, IdempotencyKey
+
+HEADER = 'Idempotency-Key'
+MAX_KEY_LENGTH = 255
+CACHE_SIZE = 10000
+DEFAULT_TTL_HOURS = 24
+
+
+def fingerprint():
+    """Hash of what makes two requests "the same": method, path and body."""
+    digest = hashlib.sha256(f'{request.method} {request.path}\n'.encode())
+    digest.update(request.get_data())
+    return digest.hexdigest()
+
+
+class IdempotencyStore:
+    """Replays the first response to a POST retried with the same ``Idempotency-Key``.
+
+    The decorated views only flush; the decorator commits. The key row, the
+    view's writes and the stored response therefore go into one
+    transaction, and a key is never seen without its response. Of two
+    concurrent requests with one key, the second fails on the table's
+    primary key and its writes are rolled back; it then replays the
+    winner's response. Finished responses are kept in an LRU cache so a
+    retry costs no query.
+    """
+
+    def __init__(self, cache_size=CACHE_SIZE):
+        self.cache_size = cache_size
+        self.ttl = timedelta(hours=DEFAULT_TTL_HOURS)
+        self._cache = OrderedDict()  # (user_id, key) -> (fingerprint, status_code, body, expires_at)
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        self.ttl = timedelta(hours=app.config.get('IDEMPOTENCY_TTL_HOURS', DEFAULT_TTL_HOURS))
+        app.extensions['idempotency'] = self
+
+    def _remember(self, cache_key, entry):
+        with self._lock:
+            self._cache[cache_key] = entry
+            self._cache.move_to_end(cache_key)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+
+    def lookup(self, user_id, key):
+        """The stored ``(fingerprint, status_code, body, expires_at)`` for a key, or None."""
+        now = datetime.utcnow()
+        cache_key = (user_id, key)
+        with self._lock:
+            entry = self._cache.get(cache_key)
+            if entry is not None and entry[3] > now:
+                self._cache.move_to_end(cache_key)
+                return entry
+
+        record = db.session.get(IdempotencyKey, (user_id, key))
+        if record is None:
+            return None
+        if record.expires_at <= now:
+            # Free the key for reuse; the primary key would otherwise reject it.
+            db.session.delete(record)
+            db.session.commit()
+            return None
+        entry = (record.fingerprint, record.status_code, record.body, record.expires_at)
+        self._remember(cache_key, entry)
+        return entry
+
+    def replay(self, entry, request_fingerprint):
+        stored_fingerprint, status_code, body, _ = entry
+        if stored_fingerprint != request_fingerprint:
+            return jsonify({'error': f'{HEADER} was already used for a different request.'}), 422
+        response = current_app.response_class(body, status=status_code, mimetype='application/json')
+        response.headers['Idempotent-Replayed'] = 'true'
+        return response
+
+    def idempotent(self, view):
+        """Decorator for POST views; put it below ``jwt_required`` so the caller is known.
+
+        The view must flush rather than commit: a 2xx response is committed
+        here, anything else is rolled back. Without the header that is all
+        that happens. Only 2xx responses are stored, so after a validation
+        error the client may correct the body and retry with the same key.
+        """
+        @wraps(view)
+        def wrapped(*args, **kwargs):
+            if request.method != 'POST':
+                return view(*args, **kwargs)
+            key = request.headers.get(HEADER)
+            if not key:
+                return self._finish(make_response(view(*args, **kwargs)))
+            if len(key) > MAX_KEY_LENGTH:
+                return jsonify({'error': f'{HEADER} must be at most {MAX_KEY_LENGTH} characters.'}), 400
+
+            user_id = current_user.id
+            request_fingerprint = fingerprint()
+            entry = self.lookup(user_id, key)
+            if entry is not None:
+                return self.replay(entry, request_fingerprint)
+
+            expires_at = datetime.utcnow() + self.ttl
+            try:
+                response = make_response(view(*args, **kwargs))
+                if not 200 <= response.status_code < 300:
+                    return self._finish(response)
+                body = response.get_data(as_text=True)
+                db.session.add(IdempotencyKey(user_id=user_id, key=key, fingerprint=request_fingerprint,
+                                              status_code=response.status_code, body=body,
+                                              expires_at=expires_at))
+                IdempotencyKey.query.filter(IdempotencyKey.expires_at < datetime.utcnow()).delete(
+                    synchronize_session=False)
+                db.session.commit()
+            except IntegrityError:
+                db.session.rollback()
+                entry = self.lookup(user_id, key)
+                if entry is None:
+                    raise
+                return self.replay(entry, request_fingerprint)
+
+            self._remember((user_id, key), (request_fingerprint, response.status_code, body, expires_at))
+            return response
+        return wrapped
+
+    @staticmethod
+    def _finish(response):
+        if 200 <= response.status_code < 300:
+            db.session.commit()
+        else:
+            db.session.rollback()
+        return response
+
+
+idempotency_store = IdempotencyStore()
@@ -0,0 +1,88 @@
+from collections import namedtuple
+import threading
+import time
+from flask_jwt_extended.config import config
+from models import User
+
+CACHE_TTL_SECONDS = 60
+PROFILE_CLAIMS = ('email', 'first_name', 'last_name', 'role')
+
+
+class CurrentUser(namedtuple('CurrentUser', ('id',) + PROFILE_CLAIMS)):
+    """The authenticated user as routes see it: profile fields only, no ORM session."""
+    __slots__ = ()
+
+    @property
+    def is_admin(self):
+        return self.role == 'admin'
+
+    @classmethod
+    def from_model(cls, user):
+        return cls(user.id, *(getattr(user, name) for name in PROFILE_CLAIMS))
+
+
+def user_claims(user):
+    """Profile fields embedded in the access token at login."""
+    return {name: getattr(user, name) for name in PROFILE_CLAIMS}
+
+
+class IdentityCache:
+    """Resolves the JWT identity to a ``CurrentUser`` with no query in the common case.
+
+    Registered as JWTManager's ``user_lookup_loader``, so
+    ``flask_jwt_extended.current_user`` is looked up once per request. Users
+    are cached per process for ``CACHE_TTL_SECONDS``; on a miss, the profile
+    claims of a token issued within that window are trusted as they are, and
+    only older tokens go to the database. Either way a profile change
+    reaches every worker within the TTL, and this worker at once through
+    ``forget``.
+    """
+
+    def __init__(self, ttl=CACHE_TTL_SECONDS):
+        self.ttl = ttl
+        self._users = {}  # id -> (CurrentUser, expires_at)
+        self._changed = {}  # id -> time of the last local change
+        self._lock = threading.Lock()
+
+    def init_app(self, app, jwt):
+        self.ttl = app.config.get('USER_CACHE_TTL', self.ttl)
+        app.extensions['identity_cache'] = self
+        jwt.user_lookup_loader(self._lookup)
+
+    def remember(self, user):
+        with self._lock:
+            self._users[user.id] = (user, time.time() + self.ttl)
+        return user
+
+    def forget(self, user_id):
+        """Drop a user whose role or credentials just changed."""
+        now = time.time()
+        with self._lock:
+            self._users.pop(user_id, None)
+            self._changed[user_id] = now
+            for key in [key for key, changed in self._changed.items() if changed < now - self.ttl]:
+                del self._changed[key]
+
+    def get(self, user_id, claims=None):
+        now = time.time()
+        entry = self._users.get(user_id)
+        if entry is not None and entry[1] > now:
+            return entry[0]
+
+        claims = claims or {}
+        issued_at = claims.get('iat', 0)
+        if (all(name in claims for name in PROFILE_CLAIMS) and issued_at > now - self.ttl
+                and issued_at > self._changed.get(user_id, 0)):
+            return self.remember(CurrentUser(user_id, *(claims[name] for name in PROFILE_CLAIMS)))
+
+        user = User.query.get(user_id)
+        if user is None:
+            return None
+        return self.remember(CurrentUser.from_model(user))
+
+    def _lookup(self, jwt_header, jwt_payload):
+        # Returning None makes flask_jwt_extended answer 401 for deleted users.
+        return self.get(int(jwt_payload[config.identity_claim_key]), jwt_payload)
+
+
+identity_cache = IdentityCache()
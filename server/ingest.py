@@ -0,0 +1,186 @@
+from collections import Counter
+from datetime import datetime
+import json
+import logging
+from sqlalchemy import insert
+from sqlalchemy.exc import SQLAlchemyError
+from events import encode_report, record_changes
+from geo import encode_geohash
+from models import db, REPORT_KINDS, Report, Status
+from stats import apply_deltas, report_keys, version_keys
+
+logger = logging.getLogger(__name__)
+
+MAX_RECORDS = 5000
+CHUNK_SIZE = 500
+
+REQUIRED_FIELDS = ('title', 'description', 'location')
+TEXT_FIELDS = ('title', 'description', 'location', 'image_url')
+
+
+class IngestError(ValueError):
+    """Raised when a batch as a whole is malformed."""
+
+
+def _max_length(field):
+    return getattr(Report.__table__.c[field].type, 'length', None)
+
+
+MAX_LENGTHS = {field: _max_length(field) for field in TEXT_FIELDS}
+COORDINATE_LIMITS = {'latitude': 90, 'longitude': 180}
+
+
+def parse_coordinate(data, field):
+    """``data[field]`` as a float within range, or None when it is absent or null.
+
+    Raises ValueError with a message for the client when it is not a
+    number or out of range; 0 is a valid coordinate.
+    """
+    value = data.get(field)
+    if value is None:
+        return None
+    try:
+        if isinstance(value, bool):
+            raise ValueError
+        number = float(value)
+    except (TypeError, ValueError):
+        raise ValueError('Latitude and longitude must be numbers')
+    limit = COORDINATE_LIMITS[field]
+    if not -limit <= number <= limit:
+        raise ValueError(f'{field} must be between -{limit} and {limit}')
+    return number
+
+
+def validate_report(data):
+    """Check one report body, returning its column values or an error string.
+
+    Shared by POST /redflags, POST /interventions and every record of
+    POST /reports/batch, so all three accept and reject the same input.
+    """
+    if not isinstance(data, dict):
+        return 'Report must be an object'
+    for field in REQUIRED_FIELDS:
+        if field not in data or not data[field]:
+            return f'Missing required field: {field}'
+    for field in TEXT_FIELDS:
+        value = data.get(field)
+        if value is None:
+            continue
+        if not isinstance(value, str):
+            return f'{field} must be a string'
+        if MAX_LENGTHS[field] and len(value) > MAX_LENGTHS[field]:
+            return f'{field} must be at most {MAX_LENGTHS[field]} characters'
+
+    try:
+        latitude = parse_coordinate(data, 'latitude')
+        longitude = parse_coordinate(data, 'longitude')
+    except ValueError as e:
+        return str(e)
+
+    return {
+        'title': data['title'],
+        'description': data['description'],
+        'location': data['location'],
+        'latitude': latitude,
+        'longitude': longitude,
+        'image_url': data.get('image_url'),
+    }
+
+
+def json_records(data):
+    """Yield ``(record, error)`` for a JSON array body."""
+    if not isinstance(data, list):
+        raise IngestError('Body must be a JSON array of reports, or NDJSON')
+    for record in data:
+        yield record, None
+
+
+def ndjson_records(lines):
+    """Yield ``(record, error)`` for each non-blank line of an NDJSON body, read as it arrives."""
+    for line in lines:
+        if not line.strip():
+            continue
+        try:
+            yield json.loads(line), None
+        except ValueError:
+            yield None, 'Invalid JSON'
+
+
+def _validate(record, error):
+    """``(kind, columns)`` for a record, or an error string."""
+    if error:
+        return error
+    if not isinstance(record, dict):
+        return 'Report must be an object'
+    kind = str(record.get('type', '')).lower()
+    if kind not in REPORT_KINDS:
+        return 'type must be one of: redflag, intervention'
+    columns = validate_report(record)
+    if isinstance(columns, str):
+        return columns
+    return kind, columns
+
+
+def _insert_chunk(rows, user_id):
+    """Insert one chunk of validated rows in its own transaction; returns their ids in order."""
+    now = datetime.utcnow()
+    status = Status.DRAFT.value
+    for row in rows:
+        has_point = row['latitude'] is not None and row['longitude'] is not None
+        row.update(user_id=user_id, status=status, created_at=now, updated_at=now,
+                   geohash=encode_geohash(row['latitude'], row['longitude']) if has_point else None)
+
+    table = Report.__table__
+    statement = insert(table).returning(table.c.id, sort_by_parameter_order=True)
+    ids = db.session.execute(statement, rows).scalars().all()
+
+    # A Core insert skips the ORM flush events that keep the counters current.
+    deltas = Counter()
+    for row in rows:
+        deltas.update(report_keys(row['kind'], status, user_id, now))
+        deltas.update(version_keys(row['kind'], user_id))
+    apply_deltas(deltas)
+    record_changes(db.session, [('create', encode_report(dict(row, id=report_id)))
+                                for row, report_id in zip(rows, ids)])
+    db.session.commit()
+    return ids
+
+
+def ingest(records, user_id):
+    """Validate and store a batch of ``(record, error)`` pairs for ``user_id``.
+
+    Every record is validated before anything is written, so a batch that
+    is too large is refused whole. Valid records are inserted
+    ``CHUNK_SIZE`` at a time with one executemany per chunk, each chunk in
+    its own transaction. Returns one result per record, in request order;
+    invalid records do not stop the others.
+    """
+    results = []
+    pending = []  # (result, row) for records that passed validation
+    for index, (record, error) in enumerate(records):
+        if index >= MAX_RECORDS:
+            raise IngestError(f'At most {MAX_RECORDS} reports per batch')
+        item = _validate(record, error)
+        if isinstance(item, str):
+            results.append({'index': index, 'ok': False, 'error': item})
+            continue
+        kind, columns = item
+        result = {'index': index, 'ok': True, 'type': kind}
+        results.append(result)
+        pending.append((result, dict(columns, kind=kind)))
+    if not results:
+        raise IngestError('Batch must contain at least one report')
+
+    for start in range(0, len(pending), CHUNK_SIZE):
+        chunk = pending[start:start + CHUNK_SIZE]
+        try:
+            ids = _insert_chunk([row for _, row in chunk], user_id)
+        except SQLAlchemyError:
+            db.session.rollback()
+            logger.exception('Could not store batch chunk of %d reports', len(chunk))
+            for result, _ in chunk:
+                result.update(ok=False, error='Could not be stored; please retry.')
+            continue
+        for (result, _), report_id in zip(chunk, ids):
+            result['id'] = report_id
+    return results
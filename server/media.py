@@ -0,0 +1,193 @@
+import hashlib
+import logging
+import mimetypes
+import os
+import queue
+import re
+import tempfile
+import threading
+from flask import Response, request, send_from_directory
+from werkzeug.exceptions import NotFound
+from werkzeug.formparser import parse_form_data
+from werkzeug.security import safe_join
+
+logger = logging.getLogger(__name__)
+
+MAX_UPLOAD_BYTES = 50 * 1024 * 1024
+THUMBNAIL_SIZE = (320, 320)
+THUMBNAIL_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif'}
+INCOMING_DIR = '.incoming'
+
+# <sha256>.<ext> and <sha256>.thumb.jpg never change once written.
+CONTENT_ADDRESSED = re.compile(r'^([0-9a-f]{64}(?:\.thumb)?)\.[a-z0-9]+$')
+IMMUTABLE_MAX_AGE = 365 * 24 * 3600
+MUTABLE_MAX_AGE = 300
+
+
+class UploadError(ValueError):
+    """Raised when an upload request has no usable file."""
+
+
+class _HashingFile:
+    """Temporary file that hashes the bytes as werkzeug's form parser writes them."""
+
+    def __init__(self, directory):
+        self.file = tempfile.NamedTemporaryFile(dir=directory, delete=False)
+        self.path = self.file.name
+        self.sha256 = hashlib.sha256()
+        self.size = 0
+
+    def write(self, data):
+        self.sha256.update(data)
+        self.size += len(data)
+        return self.file.write(data)
+
+    def __getattr__(self, name):
+        return getattr(self.file, name)
+
+
+def media_name(digest, extension):
+    return f'{digest}.{extension}'
+
+
+def thumbnail_name(digest):
+    return f'{digest}.thumb.jpg'
+
+
+def receive_upload(environ, upload_folder, allowed_file, field='file'):
+    """Stream the multipart body of an upload request straight into ``upload_folder``.
+
+    The file is hashed while it is written, in werkzeug's parser chunks, and
+    then renamed to ``<sha256>.<ext>``. If that name already exists the new
+    copy is discarded, so repeat uploads cost no extra disk. Returns
+    ``(filename, digest, size, created)``.
+    """
+    incoming = os.path.join(upload_folder, INCOMING_DIR)
+    os.makedirs(incoming, exist_ok=True)
+    written = []
+
+    def stream_factory(total_content_length, content_type, filename, content_length=None):
+        target = _HashingFile(incoming)
+        written.append(target)
+        return target
+
+    try:
+        _, _, files = parse_form_data(environ, stream_factory=stream_factory,
+                                      max_content_length=MAX_UPLOAD_BYTES)
+        upload = files.get(field)
+        if upload is None or not upload.filename:
+            raise UploadError(f'Missing file field: {field}')
+        if not allowed_file(upload.filename):
+            raise UploadError('File type not allowed')
+
+        target = upload.stream
+        target.close()
+        if target.size == 0:
+            raise UploadError('Uploaded file is empty')
+        digest = target.sha256.hexdigest()
+        filename = media_name(digest, upload.filename.rsplit('.', 1)[1].lower())
+        path = os.path.join(upload_folder, filename)
+        created = not os.path.exists(path)
+        if created:
+            os.replace(target.path, path)
+        return filename, digest, target.size, created
+    finally:
+        for target in written:
+            target.close()
+            if os.path.exists(target.path):
+                os.remove(target.path)
+
+
+def send_media(upload_folder, filename, accel_prefix=None):
+    """Serve an uploaded file with validators and caching suited to its name.
+
+    Content-addressed files get their hash as a strong ETag and a year-long
+    ``immutable`` Cache-Control; anything else (files copied in by hand) gets
+    werkzeug's mtime/size ETag and a short max-age. Range requests are
+    answered with 206 by werkzeug. With ``accel_prefix`` set, nginx is asked
+    to send the bytes via ``X-Accel-Redirect``; with Flask's
+    ``USE_X_SENDFILE`` the same happens through ``X-Sendfile``.
+    """
+    match = CONTENT_ADDRESSED.match(filename)
+    max_age = IMMUTABLE_MAX_AGE if match else MUTABLE_MAX_AGE
+
+    if accel_prefix:
+        path = safe_join(upload_folder, filename)
+        if path is None or not os.path.isfile(path):
+            raise NotFound()
+        response = Response(mimetype=mimetypes.guess_type(filename)[0] or 'application/octet-stream')
+        response.headers['X-Accel-Redirect'] = f"{accel_prefix.rstrip('/')}/{filename}"
+        if match:
+            response.set_etag(match.group(1))
+        response.cache_control.max_age = max_age
+        response.make_conditional(request)
+    else:
+        response = send_from_directory(upload_folder, filename, max_age=max_age,
+                                       etag=match.group(1) if match else True)
+
+    response.cache_control.public = True
+    if match:
+        response.cache_control.immutable = True
+    return response
+
+
+def make_thumbnail(upload_folder, filename):
+    """Write a downscaled JPEG next to an uploaded image; returns its name or None."""
+    digest, extension = filename.rsplit('.', 1)
+    if extension not in THUMBNAIL_EXTENSIONS:
+        return None
+    destination = os.path.join(upload_folder, thumbnail_name(digest))
+    if os.path.exists(destination):
+        return thumbnail_name(digest)
+
+    # Pillow is only needed by this worker, so the API runs without it.
+    from PIL import Image
+    with Image.open(os.path.join(upload_folder, filename)) as image:
+        image.thumbnail(THUMBNAIL_SIZE)
+        partial = destination + '.part'
+        image.convert('RGB').save(partial, 'JPEG', quality=85)
+    os.replace(partial, destination)
+    return thumbnail_name(digest)
+
+
+class ThumbnailWorker:
+    """Background thread that builds thumbnails off the request path.
+
+    Uploads are queued by name; a thumbnail that already exists is skipped,
+    so queueing a duplicate upload is harmless.
+    """
+
+    def __init__(self):
+        self.app = None
+        self._queue = queue.Queue()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        self.app = app
+        app.extensions['thumbnails'] = self
+
+    def ensure_started(self):
+        if self._thread is not None or not self.app.config.get('THUMBNAIL_WORKER_ENABLED', True):
+            return
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='thumbnails', daemon=True)
+                self._thread.start()
+
+    def submit(self, filename):
+        self._queue.put(filename)
+        self.ensure_started()
+
+    def _run(self):
+        while True:
+            filename = self._queue.get()
+            try:
+                make_thumbnail(self.app.config['UPLOAD_FOLDER'], filename)
+            except Exception:
+                logger.exception('Could not build a thumbnail for %s', filename)
+            finally:
+                self._queue.task_done()
+
+
+thumbnail_worker = ThumbnailWorker()
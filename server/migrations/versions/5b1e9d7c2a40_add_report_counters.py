@@ -0,0 +1,42 @@
+"""Add report counters
+
+Revision ID: 5b1e9d7c2a40
+Revises: ca3876b31654
+Create Date: 2026-10-17 13:42:10.284716
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5b1e9d7c2a40'
+down_revision = 'ca3876b31654'
+branch_labels = None
+depends_on = None
+
+# (dimension, SQL expression for its value) - must match stats.report_keys
+DIMENSIONS = (
+    ('status', 'status'),
+    ('kind', 'kind'),
+    ('user', 'CAST(user_id AS VARCHAR(50))'),
+    ('day', 'CAST(date(created_at) AS VARCHAR(50))'),
+)
+
+
+def upgrade():
+    op.create_table('report_counters',
+    sa.Column('dimension', sa.String(length=20), nullable=False),
+    sa.Column('value', sa.String(length=50), nullable=False),
+    sa.Column('count', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('dimension', 'value')
+    )
+
+    for dimension, expression in DIMENSIONS:
+        op.execute(f"INSERT INTO report_counters (dimension, value, count) "
+                   f"SELECT '{dimension}', {expression}, COUNT(*) FROM reports "
+                   f"WHERE {expression} IS NOT NULL GROUP BY {expression}")
+
+
+def downgrade():
+    op.drop_table('report_counters')
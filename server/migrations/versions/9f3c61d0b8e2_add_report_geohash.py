@@ -0,0 +1,41 @@
+"""Add report geohash
+
+Revision ID: 9f3c61d0b8e2
+Revises: 5b1e9d7c2a40
+Create Date: 2026-10-17 15:06:52.730184
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+from geo import encode_geohash
+
+
+# revision identifiers, used by Alembic.
+revision = '9f3c61d0b8e2'
+down_revision = '5b1e9d7c2a40'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('reports', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('geohash', sa.String(length=12), nullable=True))
+        batch_op.create_index('ix_reports_geohash', ['geohash'], unique=False)
+
+    connection = op.get_bind()
+    reports = sa.table('reports', sa.column('id', sa.Integer), sa.column('latitude', sa.Float),
+                       sa.column('longitude', sa.Float), sa.column('geohash', sa.String))
+    rows = connection.execute(sa.select(reports.c.id, reports.c.latitude, reports.c.longitude)
+                              .where(reports.c.latitude.isnot(None), reports.c.longitude.isnot(None)))
+    updates = [{'report_id': id, 'new_geohash': encode_geohash(latitude, longitude)}
+               for id, latitude, longitude in rows]
+    if updates:
+        connection.execute(reports.update().where(reports.c.id == sa.bindparam('report_id'))
+                           .values(geohash=sa.bindparam('new_geohash')), updates)
+
+
+def downgrade():
+    with op.batch_alter_table('reports', schema=None) as batch_op:
+        batch_op.drop_index('ix_reports_geohash')
+        batch_op.drop_column('geohash')
@@ -0,0 +1,36 @@
+"""Add report changes
+
+Revision ID: c71e5a3d9f20
+Revises: 7a1f4c9e2d58
+Create Date: 2026-10-18 11:26:40.731155
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c71e5a3d9f20'
+down_revision = '7a1f4c9e2d58'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('report_changes',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('type', sa.String(length=10), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=True),
+    sa.Column('data', sa.Text(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('report_changes', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_report_changes_created_at'), ['created_at'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('report_changes', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_report_changes_created_at'))
+
+    op.drop_table('report_changes')
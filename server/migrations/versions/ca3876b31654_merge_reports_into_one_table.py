@@ -0,0 +1,92 @@
+"""Merge red_flags and interventions into one reports table
+
+Revision ID: ca3876b31654
+Revises: 2044150ab8dd
+Create Date: 2026-10-17 11:20:05.913470
+
+Red flags keep their ids. Interventions are renumbered after the highest
+red flag id, since the two tables had overlapping id sequences. Rows
+written while status was an Enum column hold the member names
+('DRAFT', 'RESOLVED', ...); they are lowercased to the Status values the
+model and the report counters expect.
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'ca3876b31654'
+down_revision = '2044150ab8dd'
+branch_labels = None
+depends_on = None
+
+COLUMNS = ('title, description, user_id, status, location, latitude, longitude, '
+           'image_url, created_at, updated_at')
+# Same columns, reading status lowercased; PostgreSQL has no lower() for its native ENUM.
+SOURCE_COLUMNS = COLUMNS.replace('status', 'lower(CAST(status AS VARCHAR))')
+
+
+def _report_columns():
+    return [
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('title', sa.String(length=255), nullable=False),
+        sa.Column('description', sa.Text(), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('status', sa.String(length=50), nullable=True),
+        sa.Column('location', sa.String(length=255), nullable=True),
+        sa.Column('latitude', sa.Float(), nullable=True),
+        sa.Column('longitude', sa.Float(), nullable=True),
+        sa.Column('image_url', sa.String(length=8000), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+        sa.PrimaryKeyConstraint('id'),
+    ]
+
+
+def _reset_sequence(table):
+    if op.get_bind().dialect.name == 'postgresql':
+        op.execute(f"SELECT setval(pg_get_serial_sequence('{table}', 'id'), "
+                   f"COALESCE((SELECT MAX(id) FROM {table}), 0) + 1, false)")
+
+
+def upgrade():
+    op.create_table('reports',
+    sa.Column('kind', sa.String(length=20), nullable=False),
+    *_report_columns()
+    )
+    with op.batch_alter_table('reports', schema=None) as batch_op:
+        batch_op.create_index('ix_reports_created_at', ['created_at'], unique=False)
+        batch_op.create_index('ix_reports_kind_created_at', ['kind', 'created_at'], unique=False)
+        batch_op.create_index('ix_reports_user_id_created_at', ['user_id', 'created_at'], unique=False)
+        batch_op.create_index('ix_reports_status_created_at', ['status', 'created_at'], unique=False)
+
+    op.execute(f"INSERT INTO reports (id, kind, {COLUMNS}) "
+               f"SELECT id, 'redflag', {SOURCE_COLUMNS} FROM red_flags")
+    op.execute(f"INSERT INTO reports (id, kind, {COLUMNS}) "
+               f"SELECT id + (SELECT COALESCE(MAX(id), 0) FROM red_flags), 'intervention', {SOURCE_COLUMNS} "
+               f"FROM interventions")
+    _reset_sequence('reports')
+
+    op.drop_table('red_flags')
+    op.drop_table('interventions')
+
+
+def downgrade():
+    op.create_table('red_flags', *_report_columns())
+    op.create_table('interventions', *_report_columns())
+    for table in ('red_flags', 'interventions'):
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            batch_op.create_index(f'ix_{table}_user_id_created_at', ['user_id', 'created_at'], unique=False)
+            batch_op.create_index(f'ix_{table}_status_created_at', ['status', 'created_at'], unique=False)
+
+    # Interventions keep their merged ids; they only need to be unique per table.
+    op.execute(f"INSERT INTO red_flags (id, {COLUMNS}) "
+               f"SELECT id, {COLUMNS} FROM reports WHERE kind = 'redflag'")
+    op.execute(f"INSERT INTO interventions (id, {COLUMNS}) "
+               f"SELECT id, {COLUMNS} FROM reports WHERE kind = 'intervention'")
+    _reset_sequence('red_flags')
+    _reset_sequence('interventions')
+
+    op.drop_table('reports')
@@ -0,0 +1,67 @@
+"""Add report search
+
+Revision ID: d4a7e2f19c35
+Revises: 9f3c61d0b8e2
+Create Date: 2026-10-17 16:21:37.449102
+
+SQLite gets an external-content FTS5 table kept in sync by triggers;
+PostgreSQL gets a GIN index on the same tsvector expression search.py
+queries. Note that a SQLite batch_alter_table that recreates ``reports``
+drops the triggers, so such a migration must create them again.
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd4a7e2f19c35'
+down_revision = '9f3c61d0b8e2'
+branch_labels = None
+depends_on = None
+
+SQLITE_UPGRADE = (
+    "CREATE VIRTUAL TABLE reports_fts USING fts5("
+    "title, description, location, content='reports', content_rowid='id', "
+    "tokenize='unicode61 remove_diacritics 2')",
+    "CREATE TRIGGER reports_fts_ai AFTER INSERT ON reports BEGIN "
+    "INSERT INTO reports_fts(rowid, title, description, location) "
+    "VALUES (new.id, new.title, new.description, new.location); END",
+    "CREATE TRIGGER reports_fts_ad AFTER DELETE ON reports BEGIN "
+    "INSERT INTO reports_fts(reports_fts, rowid, title, description, location) "
+    "VALUES ('delete', old.id, old.title, old.description, old.location); END",
+    "CREATE TRIGGER reports_fts_au AFTER UPDATE OF title, description, location ON reports BEGIN "
+    "INSERT INTO reports_fts(reports_fts, rowid, title, description, location) "
+    "VALUES ('delete', old.id, old.title, old.description, old.location); "
+    "INSERT INTO reports_fts(rowid, title, description, location) "
+    "VALUES (new.id, new.title, new.description, new.location); END",
+    "INSERT INTO reports_fts(reports_fts) VALUES ('rebuild')",
+)
+
+SQLITE_DOWNGRADE = (
+    "DROP TRIGGER IF EXISTS reports_fts_au",
+    "DROP TRIGGER IF EXISTS reports_fts_ad",
+    "DROP TRIGGER IF EXISTS reports_fts_ai",
+    "DROP TABLE IF EXISTS reports_fts",
+)
+
+POSTGRES_DOCUMENT = ("to_tsvector('simple', coalesce(title, '') || ' ' || "
+                     "coalesce(description, '') || ' ' || coalesce(location, ''))")
+
+
+def upgrade():
+    dialect = op.get_bind().dialect.name
+    if dialect == 'sqlite':
+        for statement in SQLITE_UPGRADE:
+            op.execute(statement)
+    elif dialect == 'postgresql':
+        op.execute(f"CREATE INDEX ix_reports_search ON reports USING GIN ({POSTGRES_DOCUMENT})")
+
+
+def downgrade():
+    dialect = op.get_bind().dialect.name
+    if dialect == 'sqlite':
+        for statement in SQLITE_DOWNGRADE:
+            op.execute(statement)
+    elif dialect == 'postgresql':
+        op.execute("DROP INDEX IF EXISTS ix_reports_search")
@@ -0,0 +1,36 @@
+"""Add report query indexes
+
+Revision ID: e50d026cb8b1
+Revises: 0ddfbda39c59
+Create Date: 2026-10-17 09:12:41.208311
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e50d026cb8b1'
+down_revision = '0ddfbda39c59'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('red_flags', schema=None) as batch_op:
+        batch_op.create_index('ix_red_flags_user_id_created_at', ['user_id', 'created_at'], unique=False)
+        batch_op.create_index('ix_red_flags_status_created_at', ['status', 'created_at'], unique=False)
+
+    with op.batch_alter_table('interventions', schema=None) as batch_op:
+        batch_op.create_index('ix_interventions_user_id_created_at', ['user_id', 'created_at'], unique=False)
+        batch_op.create_index('ix_interventions_status_created_at', ['status', 'created_at'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('interventions', schema=None) as batch_op:
+        batch_op.drop_index('ix_interventions_status_created_at')
+        batch_op.drop_index('ix_interventions_user_id_created_at')
+
+    with op.batch_alter_table('red_flags', schema=None) as batch_op:
+        batch_op.drop_index('ix_red_flags_status_created_at')
+        batch_op.drop_index('ix_red_flags_user_id_created_at')
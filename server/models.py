@@ -3,7 +3,9 @@ import enum
 from flask_sqlalchemy import SQLAlchemy
 from sqlalchemy_serializer import SerializerMixin
 from sqlalchemy import Enum as SQLEnum
-from werkzeug.security import generate_password_hash, check_password_hash
+from sqlalchemy.orm import validates
+from geo import encode_geohash
+from passwords import password_hasher
 import enum
 
 # Initialize database
@@ -16,6 +18,9 @@ class Status(enum.Enum):
     RESOLVED = "resolved"
     REJECTED = "rejected"
 
+# Values of Report.kind, one per Report subclass
+REPORT_KINDS = ('redflag', 'intervention')
+
 class User(db.Model, SerializerMixin):
     __tablename__ = 'users'
     
@@ -28,42 +33,129 @@ class User(db.Model, SerializerMixin):
 
     def set_password(self, password):
         """Hash and set the user's password."""
-        self.password = generate_password_hash(password)
+        self.password = password_hasher.hash(password)
     
     def check_password(self, password):
         """Check the provided password against the stored hash."""
-        return check_password_hash(self.password, password)
+        return password_hasher.verify(self.password, password)
 
-class RedFlag(db.Model, SerializerMixin):
-    """Represents a red flag reported by a user."""
-    __tablename__ = 'red_flags'
+    def password_needs_rehash(self):
+        """True when the stored hash predates the configured method or cost."""
+        return password_hasher.needs_rehash(self.password)
+
+class Report(db.Model, SerializerMixin):
+    """A report filed by a user; ``kind`` says whether it is a red flag or an intervention."""
+    __tablename__ = 'reports'
+    __table_args__ = (
+        db.Index('ix_reports_created_at', 'created_at'),
+        db.Index('ix_reports_kind_created_at', 'kind', 'created_at'),
+        db.Index('ix_reports_user_id_created_at', 'user_id', 'created_at'),
+        db.Index('ix_reports_status_created_at', 'status', 'created_at'),
+        db.Index('ix_reports_geohash', 'geohash'),
+    )
+    serialize_rules = ('-geohash',)
 
     id = db.Column(db.Integer, primary_key=True)
+    kind = db.Column(db.String(20), nullable=False)  # redflag, intervention
     title = db.Column(db.String(255), nullable=False)
     description = db.Column(db.Text, nullable=False)
-    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
-    status = db.Column(db.String(50), default='draft')  # draft, under investigation, rejected, resolved
+    # active_history loads the old value even when the row was expired, so the
+    # counter hooks in stats.py can always subtract what a change replaced.
+    user_id = db.column_property(db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False),
+                                 active_history=True)
+    status = db.column_property(db.Column(db.String(50), default='draft'),  # draft, under investigation, rejected, resolved
+                                active_history=True)
     location = db.Column(db.String(255), nullable=True)
     latitude = db.Column(db.Float, nullable=True)
     longitude = db.Column(db.Float, nullable=True)
+    geohash = db.Column(db.String(12), nullable=True)  # derived from latitude/longitude
     image_url = db.Column(db.String(8000), nullable= True) 
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
-    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+
+    __mapper_args__ = {'polymorphic_on': kind}
+
+    @validates('latitude', 'longitude')
+    def _sync_geohash(self, key, value):
+        latitude = value if key == 'latitude' else self.latitude
+        longitude = value if key == 'longitude' else self.longitude
+        if latitude is None or longitude is None:
+            self.geohash = None
+        else:
+            self.geohash = encode_geohash(latitude, longitude)
+        return value
+
+class RedFlag(Report):
+    """Represents a red flag reported by a user."""
+    __mapper_args__ = {'polymorphic_identity': 'redflag'}
 
 # Intervention Model
-class Intervention(db.Model, SerializerMixin):
+class Intervention(Report):
     """Represents an intervention reported by a user."""
-    __tablename__ = 'interventions'
+    __mapper_args__ = {'polymorphic_identity': 'intervention'}
+
+# Running report counts behind GET /reports/stats, maintained by stats.py
+class ReportCounter(db.Model):
+    """Number of reports sharing one value of one dimension (status, kind, user or day).
+
+    Rows of the ``version`` dimension instead count writes per listing scope;
+    see stats.version_keys.
+    """
+    __tablename__ = 'report_counters'
+
+    dimension = db.Column(db.String(20), primary_key=True)
+    value = db.Column(db.String(50), primary_key=True)
+    count = db.Column(db.Integer, nullable=False, default=0)
+
+# Logged-out JWTs, kept until they would have expired anyway (see revocation.py)
+class RevokedToken(db.Model):
+    __tablename__ = 'revoked_tokens'
+
+    jti = db.Column(db.String(36), primary_key=True)
+    expires_at = db.Column(db.DateTime, nullable=False, index=True)
+
+# Responses to POSTs sent with an Idempotency-Key, replayed on retry (see idempotency.py)
+class IdempotencyKey(db.Model):
+    """One client key per user; the primary key is what turns a concurrent duplicate into an error."""
+    __tablename__ = 'idempotency_keys'
+
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), primary_key=True)
+    key = db.Column(db.String(255), primary_key=True)
+    fingerprint = db.Column(db.String(64), nullable=False)  # sha256 of method, path and body
+    status_code = db.Column(db.Integer, nullable=True)  # written with the response, in the same transaction
+    body = db.Column(db.Text, nullable=True)
+    expires_at = db.Column(db.DateTime, nullable=False, index=True)
+
+# Committed report changes, read by the /reports/events streams of every worker (see events.py)
+class ReportChange(db.Model):
+    """One insert, update or delete of a report; the id orders the stream and resumes it."""
+    __tablename__ = 'report_changes'
 
     id = db.Column(db.Integer, primary_key=True)
-    title = db.Column(db.String(255), nullable=False)
-    description = db.Column(db.Text, nullable=False)
-    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)  # Allow NULL for user_id
-    status = db.Column(db.String(50), default='draft')
-    location = db.Column(db.String(255), nullable=True)
-    latitude = db.Column(db.Float, nullable=True)
-    longitude = db.Column(db.Float, nullable=True)
-    image_url = db.Column(db.String(8000), nullable= True) 
+    type = db.Column(db.String(10), nullable=False)  # create, update, delete
+    user_id = db.Column(db.Integer, nullable=True)  # the report's owner, for per-user streams
+    data = db.Column(db.Text, nullable=False)  # the report as JSON; updates may be partial
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, index=True)
+
+# Outgoing email queue, drained by the background worker in outbox.py
+class OutboxMessage(db.Model):
+    """An email waiting to be delivered (or already delivered) by the outbox worker."""
+    __tablename__ = 'email_outbox'
+    __table_args__ = (
+        db.Index('ix_email_outbox_status_next_attempt_at', 'status', 'next_attempt_at'),
+        db.Index('ix_email_outbox_dedupe_key_status', 'dedupe_key', 'status'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    dedupe_key = db.Column(db.String(100), nullable=True)
+    recipient = db.Column(db.String(100), nullable=False)
+    subject = db.Column(db.String(255), nullable=False)
+    body = db.Column(db.Text, nullable=False)
+    status = db.Column(db.String(20), nullable=False, default='pending')  # pending, sending, sent, failed
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    last_error = db.Column(db.Text, nullable=True)
+    claim_token = db.Column(db.String(32), nullable=True)
+    next_attempt_at = db.Column(db.DateTime, default=datetime.utcnow)
+    claimed_at = db.Column(db.DateTime, nullable=True)
+    sent_at = db.Column(db.DateTime, nullable=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
-    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
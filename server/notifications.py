@@ -0,0 +1,69 @@
+import enum
+from sqlalchemy import event, inspect
+from models import db, Report, User
+from outbox import enqueue_many, outbox_worker
+
+def _status_value(value):
+    return value.value if isinstance(value, enum.Enum) else value
+
+
+def status_changes(session):
+    """Yield ``(report, old_status, new_status)`` for reports whose status is being changed."""
+    for obj in session.dirty:
+        if not isinstance(obj, Report):
+            continue
+        history = inspect(obj).attrs.status.history
+        if not history.has_changes():
+            continue
+        old = _status_value(history.deleted[0]) if history.deleted else None
+        new = _status_value(history.added[0]) if history.added else None
+        if new is not None and new != old:
+            yield obj, old, new
+
+
+def queue_status_emails(changes):
+    """Queue one email per ``(table_name, report_id, user_id, status)`` change.
+
+    Reporter addresses are looked up server-side in a single query. The
+    worker is woken once the surrounding transaction commits.
+    """
+    changes = list(changes)
+    if not changes:
+        return
+    user_ids = {user_id for _, _, user_id, _ in changes}
+    emails = dict(db.session.query(User.id, User.email).filter(User.id.in_(user_ids)))
+
+    messages = []
+    for table_name, report_id, user_id, status in changes:
+        if user_id not in emails:
+            continue
+        subject = f"Report Status Update - Report #{report_id}"
+        body = f"Hello,\n\nYour report (ID: {report_id}) has been updated to: {status.upper()}.\n\nThank you."
+        messages.append((emails[user_id], subject, body, f"{table_name}:{report_id}"))
+    enqueue_many(messages)
+    db.session.info['outbox_dirty'] = True
+
+
+def _before_flush(session, flush_context, instances):
+    # The outbox row is written in the same transaction as the status change,
+    # so a rolled-back update never sends mail and a committed one always does.
+    with session.no_autoflush:
+        queue_status_emails((report.__tablename__, report.id, report.user_id, new)
+                            for report, old, new in list(status_changes(session)))
+
+
+def _after_commit(session):
+    if session.info.pop('outbox_dirty', False):
+        outbox_worker.notify()
+
+
+def _after_rollback(session):
+    session.info.pop('outbox_dirty', None)
+
+
+def register_listeners(session=db.session):
+    """Send status-change emails for every committed RedFlag/Intervention status update."""
+    if not event.contains(session, 'before_flush', _before_flush):
+        event.listen(session, 'before_flush', _before_flush)
+        event.listen(session, 'after_commit', _after_commit)
+        event.listen(session, 'after_rollback', _after_rollback)
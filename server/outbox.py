@@ -0,0 +1,179 @@
+from datetime import datetime, timedelta
+import logging
+import threading
+import uuid
+from flask_mail import Message
+from models import db, OutboxMessage
+
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE = 50
+MAX_ATTEMPTS = 5
+RETRY_BASE_SECONDS = 30
+RETRY_MAX_SECONDS = 3600
+POLL_INTERVAL_SECONDS = 5
+# A message left in 'sending' this long belongs to a worker that died mid-batch.
+STALE_CLAIM_SECONDS = 600
+
+
+def enqueue_many(messages):
+    """Add ``(recipient, subject, body, dedupe_key)`` emails to the outbox.
+
+    The rows are committed with the caller's session. If a message with the
+    same ``dedupe_key`` is still waiting to go out, it is rewritten with the
+    new content instead of queueing a second email, so a report whose status
+    flips several times before delivery sends only its latest status. Pending
+    duplicates are found with one query for the whole batch.
+    """
+    keys = {key for _, _, _, key in messages if key is not None}
+    pending = {}
+    if keys:
+        pending = {m.dedupe_key: m for m in OutboxMessage.query.filter(
+            OutboxMessage.dedupe_key.in_(keys), OutboxMessage.status == 'pending')}
+
+    now = datetime.utcnow()
+    queued = []
+    for recipient, subject, body, dedupe_key in messages:
+        message = pending.get(dedupe_key)
+        if message is None:
+            message = OutboxMessage(dedupe_key=dedupe_key, status='pending', attempts=0)
+            db.session.add(message)
+            if dedupe_key is not None:
+                pending[dedupe_key] = message
+        message.recipient = recipient
+        message.subject = subject
+        message.body = body
+        message.next_attempt_at = now
+        queued.append(message)
+    return queued
+
+
+def retry_delay(attempts):
+    return timedelta(seconds=min(RETRY_BASE_SECONDS * 2 ** (attempts - 1), RETRY_MAX_SECONDS))
+
+
+def claim_batch(limit=BATCH_SIZE):
+    """Atomically mark up to ``limit`` due messages as ours and return them.
+
+    The claim is a single conditional UPDATE, so several workers (one per
+    gunicorn process) can drain the same outbox without sending twice.
+    """
+    now = datetime.utcnow()
+    due = db.or_(
+        db.and_(OutboxMessage.status == 'pending', OutboxMessage.next_attempt_at <= now),
+        db.and_(OutboxMessage.status == 'sending',
+                OutboxMessage.claimed_at <= now - timedelta(seconds=STALE_CLAIM_SECONDS)),
+    )
+    ids = [row.id for row in db.session.query(OutboxMessage.id)
+           .filter(due).order_by(OutboxMessage.next_attempt_at).limit(limit)]
+    if not ids:
+        return []
+
+    token = uuid.uuid4().hex
+    OutboxMessage.query.filter(OutboxMessage.id.in_(ids), due).update(
+        {'status': 'sending', 'claim_token': token, 'claimed_at': now},
+        synchronize_session=False)
+    db.session.commit()
+    return OutboxMessage.query.filter_by(claim_token=token, status='sending').all()
+
+
+def _record_failure(message, error):
+    message.attempts += 1
+    message.last_error = str(error)
+    message.claim_token = None
+    if message.attempts >= MAX_ATTEMPTS:
+        message.status = 'failed'
+        logger.error('Giving up on outbox message %s: %s', message.id, error)
+    else:
+        message.status = 'pending'
+        message.next_attempt_at = datetime.utcnow() + retry_delay(message.attempts)
+
+
+def _send_batch(connection, batch):
+    for message in batch:
+        try:
+            connection.send(Message(message.subject, recipients=[message.recipient], body=message.body))
+        except Exception as e:
+            _record_failure(message, e)
+        else:
+            message.status = 'sent'
+            message.sent_at = datetime.utcnow()
+            message.claim_token = None
+    db.session.commit()
+
+
+def drain(mail):
+    """Deliver every due message, reusing one SMTP connection for the whole run.
+
+    Returns the number of messages that were attempted.
+    """
+    batch = claim_batch()
+    if not batch:
+        return 0
+
+    attempted = 0
+    try:
+        with mail.connect() as connection:
+            while batch:
+                _send_batch(connection, batch)
+                attempted += len(batch)
+                batch = claim_batch()
+    except Exception as e:
+        # Could not open (or lost) the connection: reschedule what we hold.
+        logger.warning('SMTP connection failed: %s', e)
+        for message in batch:
+            if message.status == 'sending':
+                _record_failure(message, e)
+        db.session.commit()
+        attempted += len(batch)
+    return attempted
+
+
+class OutboxWorker:
+    """Background thread that drains the outbox off the request path.
+
+    ``notify()`` wakes it as soon as something is queued; otherwise it polls
+    every ``POLL_INTERVAL_SECONDS`` so retries and leftovers from a previous
+    process are picked up.
+    """
+
+    def __init__(self):
+        self.app = None
+        self.mail = None
+        self._thread = None
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+
+    def init_app(self, app, mail):
+        self.app = app
+        self.mail = mail
+        app.extensions['outbox'] = self
+        app.before_request(self.ensure_started)
+
+    def ensure_started(self):
+        if self._thread is not None or not self.app.config.get('OUTBOX_WORKER_ENABLED', True):
+            return
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='email-outbox', daemon=True)
+                self._thread.start()
+
+    def notify(self):
+        self.ensure_started()
+        self._wakeup.set()
+
+    def _run(self):
+        while True:
+            self._wakeup.wait(POLL_INTERVAL_SECONDS)
+            self._wakeup.clear()
+            with self.app.app_context():
+                try:
+                    drain(self.mail)
+                except Exception:
+                    logger.exception('Outbox worker iteration failed')
+                    db.session.rollback()
+                finally:
+                    db.session.remove()
+
+
+outbox_worker = OutboxWorker()
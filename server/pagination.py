@@ -0,0 +1,128 @@
+import base64
+import json
+from datetime import datetime
+from sqlalchemy import and_, or_
+from models import REPORT_KINDS
+
+DEFAULT_LIMIT = 50
+MAX_LIMIT = 200
+# Columns every paginated row must carry to build the next cursor.
+PAGE_KEYS = ('id', 'created_at')
+
+
+class PaginationError(ValueError):
+    """Raised when a listing query string cannot be parsed."""
+
+
+def encode_cursor(position):
+    """Turn a ``[created_at, id]`` position into an opaque, URL-safe cursor string."""
+    raw = json.dumps(position, separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    if not cursor:
+        return None
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        position = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (ValueError, TypeError):
+        raise PaginationError('Invalid cursor')
+    if not isinstance(position, list) or len(position) != 2:
+        raise PaginationError('Invalid cursor')
+    return position
+
+
+def parse_limit(args):
+    value = args.get('limit')
+    if value in (None, ''):
+        return DEFAULT_LIMIT
+    try:
+        limit = int(value)
+    except ValueError:
+        raise PaginationError('limit must be an integer')
+    if limit < 1:
+        raise PaginationError('limit must be positive')
+    return min(limit, MAX_LIMIT)
+
+
+def _parse_date(value, name):
+    try:
+        return datetime.fromisoformat(value)
+    except ValueError:
+        raise PaginationError(f'{name} must be an ISO 8601 date')
+
+
+def apply_filters(query, model, args):
+    """Apply the ?kind=&status=&user_id=&since=&until=&q= filters to a report query."""
+    kind = args.get('kind')
+    if kind:
+        kinds = [k.strip().lower() for k in kind.split(',') if k.strip()]
+        if any(k not in REPORT_KINDS for k in kinds):
+            raise PaginationError('kind must be one of: redflag, intervention')
+        query = query.filter(model.kind.in_(kinds))
+
+    status = args.get('status')
+    if status:
+        statuses = [s.strip().lower() for s in status.split(',') if s.strip()]
+        query = query.filter(model.status.in_(statuses))
+
+    user_id = args.get('user_id')
+    if user_id:
+        try:
+            query = query.filter(model.user_id == int(user_id))
+        except ValueError:
+            raise PaginationError('user_id must be an integer')
+
+    since = args.get('since')
+    if since:
+        query = query.filter(model.created_at >= _parse_date(since, 'since'))
+    until = args.get('until')
+    if until:
+        query = query.filter(model.created_at < _parse_date(until, 'until'))
+
+    text = args.get('q')
+    if text:
+        pattern = f'%{text.strip()}%'
+        query = query.filter(or_(
+            model.title.ilike(pattern),
+            model.description.ilike(pattern),
+            model.location.ilike(pattern),
+        ))
+    return query
+
+
+def _after(model, position):
+    """Keyset predicate for rows strictly after ``position`` in newest-first order."""
+    created_at = datetime.fromisoformat(position[0])
+    return or_(
+        model.created_at < created_at,
+        and_(model.created_at == created_at, model.id < position[1]),
+    )
+
+
+def _position(row):
+    return [row.created_at.isoformat(), row.id]
+
+
+def _page(query, model, position, limit):
+    if position:
+        try:
+            query = query.filter(_after(model, position))
+        except (ValueError, TypeError):
+            raise PaginationError('Invalid cursor')
+    return query.order_by(model.created_at.desc(), model.id.desc()).limit(limit + 1).all()
+
+
+def paginate(query, model, args):
+    """Keyset-paginate a report query ordered by (created_at, id) descending.
+
+    Returns ``(rows, next_cursor)``; ``next_cursor`` is None on the last page.
+    """
+    limit = parse_limit(args)
+    position = decode_cursor(args.get('cursor'))
+    rows = _page(apply_filters(query, model, args), model, position, limit)
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    return rows, encode_cursor(_position(rows[-1]))
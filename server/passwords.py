@@ -0,0 +1,77 @@
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+import os
+import threading
+from werkzeug.security import check_password_hash, generate_password_hash
+
+# Any werkzeug method string: "scrypt:N:r:p" or "pbkdf2:sha256:iterations".
+DEFAULT_METHOD = 'scrypt:32768:8:1'
+# Waiting hash jobs allowed per worker thread before callers are turned away.
+QUEUE_PER_WORKER = 4
+WAIT_SECONDS = 10
+
+
+class HasherBusy(RuntimeError):
+    """Raised when the hashing pool is saturated; the caller should answer 503."""
+
+
+class PasswordHasher:
+    """Password hashing with a configurable cost, run on a bounded thread pool.
+
+    scrypt and PBKDF2 release the GIL, so a small pool uses every core while
+    capping how many hashes run at once. Once the pool and its queue are
+    full, new requests fail fast with ``HasherBusy`` instead of piling up
+    behind a login burst.
+    """
+
+    def __init__(self, method=DEFAULT_METHOD, workers=None):
+        self.configure(method, workers)
+
+    def configure(self, method=DEFAULT_METHOD, workers=None):
+        self.method = method
+        self._prefix = None
+        self.workers = workers or os.cpu_count() or 1
+        # Let hashes already queued on the old pool finish, but free its threads afterwards.
+        previous = getattr(self, '_pool', None)
+        if previous is not None:
+            previous.shutdown(wait=False)
+        self._pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='password-hash')
+        self.capacity = self.workers * (1 + QUEUE_PER_WORKER)
+        self._slots = threading.BoundedSemaphore(self.capacity)
+
+    def init_app(self, app):
+        self.configure(app.config.get('PASSWORD_HASH_METHOD', DEFAULT_METHOD),
+                       app.config.get('PASSWORD_HASH_WORKERS'))
+        app.extensions['password_hasher'] = self
+
+    def _run(self, func, *args):
+        if not self._slots.acquire(blocking=False):
+            raise HasherBusy('Password hashing pool is full')
+        try:
+            future = self._pool.submit(func, *args)
+        except BaseException:
+            self._slots.release()
+            raise
+        # The slot is freed when the hash finishes, not when we stop waiting for it.
+        future.add_done_callback(lambda _: self._slots.release())
+        try:
+            return future.result(timeout=WAIT_SECONDS)
+        except FutureTimeout:
+            raise HasherBusy('Password hashing took too long') from None
+
+    def hash(self, password):
+        return self._run(generate_password_hash, password, self.method)
+
+    def verify(self, password_hash, password):
+        return self._run(check_password_hash, password_hash, password)
+
+    def needs_rehash(self, password_hash):
+        """True when the stored hash was made with a different method or cost."""
+        if self._prefix is None:
+            # Werkzeug fills in defaults ("pbkdf2" -> "pbkdf2:sha256:1000000"); compare
+            # stored hashes against the expanded form. Worked out on first use so
+            # importing the app does not pay for a throwaway hash.
+            self._prefix = generate_password_hash('', self.method).split('$', 1)[0]
+        return password_hash.split('$', 1)[0] != self._prefix
+
+
+password_hasher = PasswordHasher()
@@ -0,0 +1,121 @@
+from functools import wraps
+import math
+import threading
+import time
+from flask import jsonify, request
+
+PURGE_EVERY = 1000
+
+
+class MemoryBackend:
+    """Sliding-window counters in a dict: key -> [window, count, previous_count, period]."""
+
+    def __init__(self):
+        self._windows = {}
+        self._lock = threading.Lock()
+        self._hits = 0
+
+    def hit(self, key, limit, period, now):
+        window = int(now // period)
+        with self._lock:
+            entry = self._windows.get(key)
+            if entry is None or entry[0] < window - 1:
+                entry = self._windows[key] = [window, 0, 0, period]
+            elif entry[0] == window - 1:
+                entry[:3] = [window, 0, entry[1]]
+            allowed, retry_after = _decide(entry[1], entry[2], limit, period, now)
+            if allowed:
+                entry[1] += 1
+            self._hits += 1
+            if self._hits % PURGE_EVERY == 0:
+                self._purge(now)
+        return allowed, retry_after
+
+    def _purge(self, now):
+        # An entry two or more windows old would be reset on its next hit anyway.
+        stale = [key for key, (window, _, _, period) in self._windows.items()
+                 if window < int(now // period) - 1]
+        for key in stale:
+            del self._windows[key]
+
+
+class RedisBackend:
+    """Sliding-window counters shared by every worker through Redis."""
+
+    def __init__(self, url, prefix='ratelimit:'):
+        # Only needed when RATELIMIT_BACKEND=redis.
+        import redis
+        self.client = redis.Redis.from_url(url)
+        self.prefix = prefix
+
+    def hit(self, key, limit, period, now):
+        window = int(now // period)
+        current = f'{self.prefix}{key}:{window}'
+        pipe = self.client.pipeline()
+        pipe.incr(current)
+        pipe.expire(current, period * 2)
+        pipe.get(f'{self.prefix}{key}:{window - 1}')
+        count, _, previous = pipe.execute()
+        # The INCR above already counted this attempt.
+        return _decide(count - 1, int(previous or 0), limit, period, now)
+
+
+def _decide(count, previous, limit, period, now):
+    """Sliding-window estimate: this window's count plus the overlapping share of the last one.
+
+    Returns ``(allowed, retry_after_seconds)``.
+    """
+    elapsed = now % period
+    estimate = previous * (1 - elapsed / period) + count
+    if estimate < limit:
+        return True, 0
+    if count >= limit or previous == 0:
+        return False, math.ceil(period - elapsed)
+    # Time until the previous window's share decays enough to admit one more.
+    wait = period * (1 - (limit - count) / previous) - elapsed
+    return False, max(1, math.ceil(wait))
+
+
+class RateLimiter:
+    """Applies sliding-window limits to views; the backend is chosen in ``init_app``."""
+
+    def __init__(self):
+        self.backend = MemoryBackend()
+        self.enabled = True
+
+    def init_app(self, app):
+        if app.config.get('RATELIMIT_BACKEND', 'memory') == 'redis':
+            self.backend = RedisBackend(app.config['RATELIMIT_REDIS_URL'])
+        else:
+            self.backend = MemoryBackend()
+        self.enabled = app.config.get('RATELIMIT_ENABLED', True)
+        app.extensions['ratelimit'] = self
+
+    def limit(self, name, per_ip=None, per_email=None):
+        """Decorator allowing ``(limit, period_seconds)`` calls per client IP and per email.
+
+        The email is read from the JSON body. A refused call gets 429 with
+        Retry-After before the view runs, so it costs no query and no hash.
+        """
+        def decorator(view):
+            @wraps(view)
+            def wrapped(*args, **kwargs):
+                if self.enabled:
+                    checks = []
+                    if per_ip:
+                        checks.append((f'{name}:ip:{request.remote_addr}', per_ip))
+                    email = (request.get_json(silent=True) or {}).get('email') if per_email else None
+                    if isinstance(email, str) and email.strip():
+                        checks.append((f'{name}:email:{email.strip().lower()}', per_email))
+                    now = time.time()
+                    for key, (limit, period) in checks:
+                        allowed, retry_after = self.backend.hit(key, limit, period, now)
+                        if not allowed:
+                            response = jsonify({'error': 'Too many attempts, please try again later.'})
+                            return response, 429, {'Retry-After': str(retry_after)}
+                return view(*args, **kwargs)
+            return wrapped
+        return decorator
+
+
+rate_limiter = RateLimiter()
@@ -0,0 +1,95 @@
+from collections import OrderedDict
+from datetime import datetime
+import threading
+import time
+from models import db, RevokedToken
+
+CACHE_SIZE = 10000
+# How long a "not revoked" answer is trusted before the backend is asked
+# again. Revocations made by another worker take at most this long to
+# reach this process; revocations made here are seen immediately.
+NEGATIVE_TTL_SECONDS = 30
+
+
+class SQLBackend:
+    """Revoked jtis in the revoked_tokens table, indexed by expiry for purging."""
+
+    def add(self, jti, expires_at):
+        db.session.merge(RevokedToken(jti=jti, expires_at=datetime.utcfromtimestamp(expires_at)))
+        RevokedToken.query.filter(RevokedToken.expires_at < datetime.utcnow()).delete(synchronize_session=False)
+        db.session.commit()
+
+    def contains(self, jti):
+        return db.session.query(RevokedToken.jti).filter_by(jti=jti).first() is not None
+
+
+class RedisBackend:
+    """Revoked jtis as Redis keys that expire together with the token."""
+
+    def __init__(self, url, prefix='revoked:'):
+        # Only needed when REVOCATION_BACKEND=redis.
+        import redis
+        self.client = redis.Redis.from_url(url)
+        self.prefix = prefix
+
+    def add(self, jti, expires_at):
+        self.client.set(self.prefix + jti, 1, exat=int(expires_at))
+
+    def contains(self, jti):
+        return bool(self.client.exists(self.prefix + jti))
+
+
+class RevocationStore:
+    """JWT revocation list with an in-process LRU cache in front of the backend.
+
+    A cache hit costs one dict lookup. Revoked entries stay cached until the
+    token expires; "not revoked" answers for ``NEGATIVE_TTL_SECONDS``.
+    """
+
+    def __init__(self, cache_size=CACHE_SIZE, negative_ttl=NEGATIVE_TTL_SECONDS):
+        self.backend = None
+        self.cache_size = cache_size
+        self.negative_ttl = negative_ttl
+        self._cache = OrderedDict()  # jti -> (revoked, cached_until)
+        self._lock = threading.Lock()
+
+    def init_app(self, app, jwt):
+        if app.config.get('REVOCATION_BACKEND', 'sql') == 'redis':
+            self.backend = RedisBackend(app.config['REVOCATION_REDIS_URL'])
+        else:
+            self.backend = SQLBackend()
+        app.extensions['revocation'] = self
+        jwt.token_in_blocklist_loader(self._check)
+
+    def _remember(self, jti, revoked, cached_until):
+        with self._lock:
+            self._cache[jti] = (revoked, cached_until)
+            self._cache.move_to_end(jti)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+
+    def revoke(self, payload):
+        self.backend.add(payload['jti'], payload['exp'])
+        self._remember(payload['jti'], True, payload['exp'])
+
+    def is_revoked(self, payload):
+        jti = payload['jti']
+        now = time.time()
+        with self._lock:
+            entry = self._cache.get(jti)
+            if entry is not None and entry[1] > now:
+                self._cache.move_to_end(jti)
+                return entry[0]
+
+        revoked = self.backend.contains(jti)
+        self._remember(jti, revoked, payload['exp'] if revoked else now + self.negative_ttl)
+        return revoked
+
+    def _check(self, jwt_header, jwt_payload):
+        # Tokens issued before expiry was switched on never lapse; refuse them.
+        if 'exp' not in jwt_payload:
+            return True
+        return self.is_revoked(jwt_payload)
+
+
+revocation_store = RevocationStore()
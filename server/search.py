@@ -0,0 +1,70 @@
+import re
+from sqlalchemy import and_, column, func, literal_column, or_, table
+from pagination import PaginationError, decode_cursor, encode_cursor, parse_limit
+
+# SQLite: FTS5 table over reports(title, description, location), kept in sync
+# by triggers. PostgreSQL: GIN index on SEARCH_DOCUMENT. Both are created by
+# the "add report search" migration.
+FTS_TABLE = 'reports_fts'
+TS_CONFIG = 'simple'
+MAX_TERMS = 10
+
+_WORD = re.compile(r'\w+', re.UNICODE)
+
+
+def search_terms(text):
+    """Split ``?q=`` into lower-cased words; punctuation never reaches the MATCH syntax."""
+    terms = _WORD.findall((text or '').lower())[:MAX_TERMS]
+    if not terms:
+        raise PaginationError('q must contain at least one word')
+    return terms
+
+
+def search_document(model):
+    # Must stay identical to the indexed expression in the migration.
+    text = (func.coalesce(model.title, '') + ' ' + func.coalesce(model.description, '')
+            + ' ' + func.coalesce(model.location, ''))
+    return func.to_tsvector(literal_column(f"'{TS_CONFIG}'"), text)
+
+
+def _sqlite_match(query, model, terms):
+    """Join the FTS5 index; every term must match, the last one as a prefix."""
+    fts = table(FTS_TABLE, column('rowid'))
+    match = ' '.join(f'"{term}"' for term in terms[:-1]) + f' "{terms[-1]}"*'
+    query = query.join(fts, fts.c.rowid == model.id).filter(literal_column(FTS_TABLE).op('MATCH')(match.strip()))
+    # bm25() is lower for better matches.
+    return query, func.bm25(literal_column(FTS_TABLE))
+
+
+def _postgres_match(query, model, terms):
+    tsquery = func.to_tsquery(literal_column(f"'{TS_CONFIG}'"), ' & '.join(terms[:-1] + [terms[-1] + ':*']))
+    document = search_document(model)
+    query = query.filter(document.op('@@')(tsquery))
+    # ts_rank() is higher for better matches; negate it so both dialects sort ascending.
+    return query, -func.ts_rank(document, tsquery)
+
+
+def search(query, model, args, dialect):
+    """Rank ``query`` against ``?q=`` and keyset-paginate by (score, id).
+
+    Returns ``(rows, next_cursor)`` like ``pagination.paginate``.
+    """
+    terms = search_terms(args.get('q'))
+    limit = parse_limit(args)
+    position = decode_cursor(args.get('cursor'))
+
+    match = _postgres_match if dialect == 'postgresql' else _sqlite_match
+    query, score = match(query, model, terms)
+    query = query.add_columns(score.label('score'))
+    if position:
+        try:
+            query = query.filter(or_(score > float(position[0]),
+                                     and_(score == float(position[0]), model.id > int(position[1]))))
+        except (ValueError, TypeError):
+            raise PaginationError('Invalid cursor')
+
+    rows = query.order_by(score, model.id).limit(limit + 1).all()
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    return rows, encode_cursor([rows[-1].score, rows[-1].id])
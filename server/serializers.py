@@ -0,0 +1,138 @@
+import copy
+from datetime import date, datetime
+import enum
+from models import Intervention, RedFlag, Report, User
+
+
+# Listing representation with the field names once and a list of values per row.
+COLUMNS_MIMETYPE = 'application/vnd.ireporter.columns+json'
+# Distinct ?fields= projections remembered per serializer.
+MAX_PROJECTIONS = 256
+
+
+class FieldsError(ValueError):
+    """Raised when ``?fields=`` names a field the serializer does not expose."""
+
+
+def _encode_datetime(value):
+    # Same output as SerializerMixin's '%Y-%m-%d %H:%M:%S', without strftime.
+    if value is None:
+        return None
+    return value.isoformat(' ', 'seconds')
+
+
+def _encode_date(value):
+    if value is None:
+        return None
+    return value.isoformat()
+
+
+def _encode_enum(value):
+    if isinstance(value, enum.Enum):
+        return value.value
+    return value
+
+
+class ModelSerializer:
+    """Serializer for one model with its column list and encoders resolved once.
+
+    ``to_dict`` on SerializerMixin re-inspects the mapper for every row; this
+    does that work when the serializer is built, so encoding a row is a
+    single pass over a precomputed ``(name, encoder)`` list. It accepts ORM
+    instances (``dump``/``dump_many``) as well as plain row tuples from
+    ``Query.with_entities(*serializer.columns)`` or a Core ``select()``
+    (``dump_rows``), which skips building ORM objects altogether.
+    """
+
+    def __init__(self, model, exclude=()):
+        self.model = model
+        self.fields = []
+        self.columns = []
+        for column in model.__table__.columns:
+            if column.key in exclude:
+                continue
+            encoder = self._encoder_for(column)
+            self.fields.append((column.key, encoder))
+            self.columns.append(getattr(model, column.key))
+        self.names = tuple(name for name, _ in self.fields)
+        self._encoded = [(name, encoder) for name, encoder in self.fields if encoder is not None]
+        self._projections = {}
+
+    @staticmethod
+    def _encoder_for(column):
+        try:
+            python_type = column.type.python_type
+        except NotImplementedError:
+            return None
+        if issubclass(python_type, datetime):
+            return _encode_datetime
+        if issubclass(python_type, date):
+            return _encode_date
+        if issubclass(python_type, enum.Enum):
+            return _encode_enum
+        return None
+
+    def project(self, fields, keys=()):
+        """A serializer for just the comma-separated ``fields``, or this one if none are given.
+
+        Only those columns are selected, so unused Text columns never leave
+        the database. ``keys`` are selected as well, after them, for callers
+        that need them (e.g. the pagination cursor) but are not emitted:
+        ``dump_rows`` zips by ``names`` and stops before the extra columns.
+        """
+        names = [name.strip() for name in (fields or '').split(',') if name.strip()]
+        if not names:
+            return self
+        for name in names:
+            if name not in self.names:
+                raise FieldsError(f'Unknown field: {name}')
+        wanted = tuple(name for name in self.names if name in names)
+        projection = self._projections.get((wanted, keys))
+        if projection is None:
+            projection = copy.copy(self)
+            projection.fields = [(name, encoder) for name, encoder in self.fields if name in wanted]
+            projection.names = wanted
+            projection._encoded = [(name, encoder) for name, encoder in projection.fields if encoder is not None]
+            projection.columns = [getattr(self.model, name) for name in wanted + tuple(k for k in keys if k not in wanted)]
+            projection._projections = {}
+            if len(self._projections) < MAX_PROJECTIONS:
+                self._projections[(wanted, keys)] = projection
+        return projection
+
+    def dump(self, obj):
+        return {name: (getattr(obj, name) if encoder is None else encoder(getattr(obj, name)))
+                for name, encoder in self.fields}
+
+    def dump_many(self, objs):
+        return [self.dump(obj) for obj in objs]
+
+    def dump_rows(self, rows):
+        """Encode row tuples whose values are in ``self.columns`` order."""
+        names = self.names
+        encoded = self._encoded
+        result = [dict(zip(names, row)) for row in rows]
+        for name, encoder in encoded:
+            for item in result:
+                item[name] = encoder(item[name])
+        return result
+
+    def dump_columns(self, rows):
+        """Encode row tuples as ``{'fields': names, 'rows': [[value, ...], ...]}``.
+
+        The compact listing format: names are written once instead of once
+        per row, which makes an uncompressed page of reports about a quarter smaller.
+        """
+        width = len(self.names)
+        encoded = [(index, encoder) for index, (_, encoder) in enumerate(self.fields) if encoder is not None]
+        result = [list(row[:width]) for row in rows]
+        for index, encoder in encoded:
+            for values in result:
+                values[index] = encoder(values[index])
+        return {'fields': list(self.names), 'rows': result}
+
+
+# geohash only backs the location index.
+report_serializer = ModelSerializer(Report, exclude=('geohash',))
+redflag_serializer = ModelSerializer(RedFlag, exclude=('geohash',))
+intervention_serializer = ModelSerializer(Intervention, exclude=('geohash',))
+user_serializer = ModelSerializer(User, exclude=('password',))
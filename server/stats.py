@@ -0,0 +1,159 @@
+from collections import Counter
+import enum
+from sqlalchemy import event, func, inspect
+from sqlalchemy.dialects import postgresql, sqlite
+from models import db, REPORT_KINDS, Report, ReportCounter, Status
+
+# Both dialects spell the upsert the same way, with their own insert().
+UPSERTS = {
+    'postgresql': postgresql.insert,
+    'sqlite': sqlite.insert,
+}
+
+
+def _status_value(value):
+    return value.value if isinstance(value, enum.Enum) else value
+
+
+def report_keys(kind, status, user_id, created_at):
+    """The ``(dimension, value)`` counters one report contributes to."""
+    keys = [('kind', kind), ('user', str(user_id))]
+    if status is not None:
+        keys.append(('status', _status_value(status)))
+    if created_at is not None:
+        keys.append(('day', created_at.date().isoformat()))
+    return keys
+
+
+# Counter rows of this dimension are change markers, not report counts.
+VERSION = 'version'
+
+
+def version_keys(kind, *user_ids):
+    """The change markers a write to one report bumps: each listing scope that can show it.
+
+    Scopes are ``all``, ``kind:<kind>`` and ``user:<id>``; see
+    conditional.listing_etag.
+    """
+    keys = [(VERSION, 'all'), (VERSION, f'kind:{kind}')]
+    keys.extend((VERSION, f'user:{user_id}') for user_id in dict.fromkeys(user_ids) if user_id is not None)
+    return keys
+
+
+def read_version(scope):
+    """How many report writes ``scope`` has seen; it only ever grows."""
+    return db.session.query(ReportCounter.count).filter_by(dimension=VERSION, value=scope).scalar() or 0
+
+
+def apply_deltas(deltas, connection=None):
+    """Add ``{(dimension, value): delta}`` to the counters in one upsert.
+
+    Runs on the caller's connection, so the counters commit or roll back
+    together with the report change that produced them.
+    """
+    deltas = {key: delta for key, delta in deltas.items() if delta}
+    if not deltas:
+        return
+    connection = connection or db.session.connection()
+    insert = UPSERTS[connection.dialect.name]
+    table = ReportCounter.__table__
+    statement = insert(table).values([
+        {'dimension': dimension, 'value': value, 'count': delta}
+        for (dimension, value), delta in sorted(deltas.items())
+    ])
+    connection.execute(statement.on_conflict_do_update(
+        index_elements=[table.c.dimension, table.c.value],
+        set_={'count': table.c.count + statement.excluded['count']},
+    ))
+
+
+def _original(state, name):
+    history = state.attrs[name].history
+    if history.deleted:
+        return history.deleted[0]
+    return getattr(state.obj(), name)
+
+
+def flush_deltas(session):
+    """Counter changes for the reports inserted, deleted or re-statused in this flush."""
+    deltas = Counter()
+    for obj in session.new:
+        if isinstance(obj, Report):
+            deltas.update(report_keys(obj.kind, obj.status, obj.user_id, obj.created_at))
+            deltas.update(version_keys(obj.kind, obj.user_id))
+    for obj in session.deleted:
+        if isinstance(obj, Report):
+            state = inspect(obj)
+            deltas.subtract(report_keys(obj.kind, _original(state, 'status'),
+                                        _original(state, 'user_id'), _original(state, 'created_at')))
+            deltas.update(version_keys(obj.kind, _original(state, 'user_id')))
+    for obj in session.dirty:
+        if not isinstance(obj, Report) or obj in session.deleted or not session.is_modified(obj):
+            continue
+        state = inspect(obj)
+        deltas.update(version_keys(obj.kind, _original(state, 'user_id'), obj.user_id))
+        if not (state.attrs.status.history.has_changes() or state.attrs.user_id.history.has_changes()):
+            continue
+        deltas.subtract(report_keys(obj.kind, _original(state, 'status'),
+                                    _original(state, 'user_id'), obj.created_at))
+        deltas.update(report_keys(obj.kind, obj.status, obj.user_id, obj.created_at))
+    return deltas
+
+
+def _after_flush(session, flush_context):
+    # Column defaults (status, created_at) are filled in by now, and the
+    # attribute history is not reset until after_flush_postexec.
+    apply_deltas(flush_deltas(session), session.connection())
+
+
+def register_counters(session=db.session):
+    """Keep report_counters in step with every ORM insert, update and delete of a Report."""
+    if not event.contains(session, 'after_flush', _after_flush):
+        event.listen(session, 'after_flush', _after_flush)
+
+
+def rebuild_counters():
+    """Recount every dimension from the reports table, replacing the stored counters.
+
+    Change markers are left alone: resetting them could let a listing ETag
+    issued before the rebuild match different rows later. Returns the
+    number of counter rows written. The caller commits.
+    """
+    day = func.date(Report.created_at)
+    sources = (
+        ('status', Report.status),
+        ('kind', Report.kind),
+        ('user', Report.user_id),
+        ('day', day),
+    )
+    rows = []
+    for dimension, column in sources:
+        query = db.session.query(column, func.count()).filter(column.isnot(None)).group_by(column)
+        rows.extend({'dimension': dimension, 'value': str(value), 'count': count}
+                    for value, count in query)
+
+    db.session.query(ReportCounter).filter(ReportCounter.dimension != VERSION).delete(
+        synchronize_session=False)
+    if rows:
+        db.session.execute(ReportCounter.__table__.insert(), rows)
+    return len(rows)
+
+
+def read_stats():
+    """Counts per status, kind, user and day, read straight from report_counters."""
+    stats = {
+        'status': {status.value: 0 for status in Status},
+        'kind': {kind: 0 for kind in REPORT_KINDS},
+        'user': {},
+        'day': {},
+    }
+    for counter in ReportCounter.query.filter(ReportCounter.count != 0).order_by(ReportCounter.value):
+        if counter.dimension in stats:
+            stats[counter.dimension][counter.value] = counter.count
+    return {
+        'total': sum(stats['kind'].values()),
+        'by_status': stats['status'],
+        'by_kind': stats['kind'],
+        'by_user': stats['user'],
+        'by_day': stats['day'],
+    }
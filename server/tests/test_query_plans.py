@@ -0,0 +1,74 @@
+"""Query-plan regression tests for the report listings and the login lookup.
+
+Run from the server directory:
+
+    python -m unittest discover tests
+"""
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from flask import Flask
+from werkzeug.datastructures import MultiDict
+from models import db, Report, User
+from pagination import apply_filters, parse_limit
+
+
+def query_plan(query):
+    """SQLite's EXPLAIN QUERY PLAN for an ORM query, as one string."""
+    compiled = query.statement.compile(db.engine, compile_kwargs={'literal_binds': True})
+    rows = db.session.connection().exec_driver_sql(f'EXPLAIN QUERY PLAN {compiled}').all()
+    return '\n'.join(row[-1] for row in rows)
+
+
+def listing(**args):
+    """The SELECT a listing runs for ``args``, as built by pagination.paginate."""
+    args = MultiDict(args)
+    query = apply_filters(Report.query, Report, args)
+    return query.order_by(Report.created_at.desc(), Report.id.desc()).limit(parse_limit(args) + 1)
+
+
+class QueryPlanTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.app = Flask(__name__)
+        cls.app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite://'
+        db.init_app(cls.app)
+
+    def setUp(self):
+        self.context = self.app.app_context()
+        self.context.push()
+        db.create_all()
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.context.pop()
+
+    def assertUsesIndex(self, query, index):
+        plan = query_plan(query)
+        self.assertIn(f'USING INDEX {index}', plan, plan)
+
+    def test_login_lookup_uses_email_unique_index(self):
+        # The UNIQUE constraint's own index; no separate ix_users_email is needed.
+        plan = query_plan(User.query.filter_by(email='someone@example.com'))
+        self.assertRegex(plan, r'USING (COVERING )?INDEX sqlite_autoindex_users_\d', plan)
+
+    def test_feed_uses_created_at_index(self):
+        self.assertUsesIndex(listing(), 'ix_reports_created_at')
+
+    def test_kind_listing_uses_kind_index(self):
+        self.assertUsesIndex(listing(kind='redflag'), 'ix_reports_kind_created_at')
+
+    def test_user_listing_uses_user_index(self):
+        self.assertUsesIndex(listing(user_id='7'), 'ix_reports_user_id_created_at')
+
+    def test_status_listing_uses_status_index(self):
+        self.assertUsesIndex(listing(status='draft'), 'ix_reports_status_created_at')
+
+
+if __name__ == '__main__':
+    unittest.main()
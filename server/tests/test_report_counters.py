@@ -0,0 +1,137 @@
+"""Checks that report_counters stays equal to a full recount after every write path.
+
+Reports are written three ways, each keeping the counters current by hand:
+ORM flushes (stats.register_counters), bulk.apply_operations and
+ingest.ingest. After each, the stored counters must match what
+``flask rebuild-stats`` (stats.rebuild_counters) computes from scratch.
+
+Run from the server directory:
+
+    python -m unittest discover tests
+"""
+from datetime import datetime, timedelta
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from flask import Flask
+from bulk import apply_operations
+from ingest import ingest, json_records
+from models import db, Intervention, RedFlag, ReportCounter, Status, User
+from stats import VERSION, read_stats, rebuild_counters, register_counters
+
+
+def stored_counters():
+    """``{(dimension, value): count}`` as report_counters holds them, change markers left out."""
+    rows = (db.session.query(ReportCounter.dimension, ReportCounter.value, ReportCounter.count)
+            .filter(ReportCounter.dimension != VERSION, ReportCounter.count != 0))
+    return {(dimension, value): count for dimension, value, count in rows}
+
+
+def report(model, user, title, status=Status.DRAFT.value, days_ago=0):
+    created_at = datetime(2025, 3, 10) - timedelta(days=days_ago)
+    return model(title=title, description='d', location='Nairobi', user_id=user.id, status=status,
+                 created_at=created_at, updated_at=created_at)
+
+
+class ReportCountersTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.app = Flask(__name__)
+        cls.app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite://'
+        db.init_app(cls.app)
+        register_counters()
+
+    def setUp(self):
+        self.context = self.app.app_context()
+        self.context.push()
+        db.create_all()
+        self.alice = User(first_name='Alice', last_name='A', email='alice@example.com', password='x')
+        self.bob = User(first_name='Bob', last_name='B', email='bob@example.com', password='x')
+        db.session.add_all([self.alice, self.bob])
+        db.session.commit()
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.context.pop()
+
+    def assertCountersMatchRebuild(self):
+        db.session.commit()
+        incremental = stored_counters()
+        stats = read_stats()
+        rebuild_counters()
+        db.session.commit()
+        self.assertEqual(incremental, stored_counters())
+        self.assertEqual(stats, read_stats())
+
+    def test_orm_create(self):
+        db.session.add_all([
+            report(RedFlag, self.alice, 'a'),
+            report(RedFlag, self.alice, 'b', days_ago=1),
+            report(Intervention, self.bob, 'c', status=Status.RESOLVED.value),
+        ])
+        self.assertCountersMatchRebuild()
+        self.assertEqual(read_stats()['total'], 3)
+
+    def test_orm_status_change_and_delete(self):
+        first = report(RedFlag, self.alice, 'a')
+        second = report(Intervention, self.bob, 'b', days_ago=2)
+        db.session.add_all([first, second])
+        db.session.commit()
+
+        first.status = Status.UNDER_INVESTIGATION.value
+        second.title = 'renamed'
+        db.session.commit()
+        self.assertCountersMatchRebuild()
+
+        db.session.delete(second)
+        self.assertCountersMatchRebuild()
+        self.assertEqual(read_stats()['by_status'][Status.UNDER_INVESTIGATION.value], 1)
+
+    def test_bulk_update_and_delete(self):
+        reports = [report(RedFlag, self.alice, 'a'), report(RedFlag, self.bob, 'b'),
+                   report(Intervention, self.alice, 'c', days_ago=3)]
+        db.session.add_all(reports)
+        db.session.commit()
+        first, second, third = (item.id for item in reports)
+
+        results = apply_operations([
+            {'type': 'redflag', 'id': first, 'status': 'rejected'},
+            {'type': 'redflag', 'id': second, 'status': 'resolved'},
+            {'type': 'redflag', 'id': second, 'action': 'delete'},
+            {'type': 'intervention', 'id': third, 'action': 'delete'},
+            {'type': 'intervention', 'id': first, 'status': 'resolved'},  # wrong kind: not applied
+        ])
+        self.assertEqual([result['ok'] for result in results], [True, True, True, True, False])
+        self.assertCountersMatchRebuild()
+        self.assertEqual(read_stats()['total'], 1)
+
+    def test_batch_ingest(self):
+        records = [
+            {'type': 'redflag', 'title': 'a', 'description': 'd', 'location': 'l'},
+            {'type': 'intervention', 'title': 'b', 'description': 'd', 'location': 'l'},
+            {'type': 'redflag', 'title': 'missing description', 'location': 'l'},
+            {'type': 'redflag', 'title': 'c', 'description': 'd', 'location': 'l'},
+        ]
+        results = ingest(json_records(records), self.bob.id)
+        self.assertEqual([result['ok'] for result in results], [True, True, False, True])
+        self.assertCountersMatchRebuild()
+        self.assertEqual(read_stats()['by_kind'], {'redflag': 2, 'intervention': 1})
+
+    def test_mixed_paths(self):
+        db.session.add(report(RedFlag, self.alice, 'a', days_ago=1))
+        db.session.commit()
+        ids = [result['id'] for result in ingest(json_records([
+            {'type': 'intervention', 'title': 'b', 'description': 'd', 'location': 'l'},
+        ]), self.alice.id)]
+        apply_operations([{'type': 'intervention', 'id': ids[0], 'status': 'under_investigation'}])
+        db.session.delete(db.session.get(Intervention, ids[0]))
+        self.assertCountersMatchRebuild()
+
+
+if __name__ == '__main__':
+    unittest.main()